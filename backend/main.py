@@ -1,11 +1,34 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from routes import router
+from fastapi.middleware.gzip import GZipMiddleware
+from routes import router, run_save_worker, run_fingerprint_sync, run_mirror_sync, warm_up
+from utils.metrics import HTTP_REQUEST_DURATION
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open Notion connections and load reference data without delaying the start-up
+    warming = asyncio.create_task(warm_up())
+    # Background worker saving queued transactions to Notion
+    save_worker = asyncio.create_task(run_save_worker())
+    # Periodic harvest of the transactions already in Notion into the duplicate index
+    fingerprint_sync = asyncio.create_task(run_fingerprint_sync())
+    # Local mirror of the reference databases served by the listing routes
+    mirror_sync = asyncio.create_task(run_mirror_sync())
+    yield
+    save_worker.cancel()
+    fingerprint_sync.cancel()
+    mirror_sync.cancel()
+    warming.cancel()
 
 app = FastAPI(
     title="Financial Management API",
     description="API for managing finances with Notion integration",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -22,6 +45,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON responses (/bootstrap, /process-csv) for clients accepting gzip
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=6)
+
+# Duration of every request by route template (e.g. /jobs/{job_id}), see GET /metrics.
+# Streamed responses are timed until their headers are sent.
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - start,
+            method=request.method, route=route.path if route else "unmatched", status=str(status)
+        )
+
 # Include all routes
 app.include_router(router)
 
@@ -86,6 +86,9 @@ class TransactionEntry(BaseModel):
     to_saving_id: Optional[str] = None
     transfer_type: Optional[str] = None
 
+    # Set by /process-csv when an identical transaction is already in Notion (but was matched to another row)
+    possible_duplicate: bool = False
+
     class Config:
         populate_by_name = True
 
@@ -94,6 +97,7 @@ class CSVProcessStats(BaseModel):
     total_rows_in_csv: int
     processed_for_review: int
     already_loaded_in_csv: int
+    already_imported: int = 0 # Skipped, already saved to Notion by a previous upload
     expenses_found: int
     incomes_found: int
     transfers_found: int
@@ -103,4 +107,25 @@ class CSVProcessResponse(BaseModel):
     status: str
     message: str
     entries: List[TransactionEntry]
-    stats: CSVProcessStats
\ No newline at end of file
+    stats: CSVProcessStats
+    warnings: List[str] = []  # e.g. reference lists that failed to load from Notion
+    timings: Optional[Dict[str, float]] = None  # Milliseconds per phase: decode, fetch_reference, categorize, sort, validate (serialize is in Server-Timing only)
+    profile: Optional[str] = None  # cProfile summary, with ?profile=1
+
+class CSVFileResult(BaseModel):
+    filename: str
+    status: str  # 'success' or 'error'
+    message: str
+    stats: Optional[CSVProcessStats] = None
+
+class CSVBatchProcessResponse(BaseModel):
+    status: str  # 'success', 'partial' or 'error'
+    message: str
+    entries: List[TransactionEntry]  # All files merged, sorted by date
+    files: List[CSVFileResult]
+    warnings: List[str] = []
+
+class BatchSaveResponse(BaseModel):
+    status: str  # 'queued' once every entry is in the save queue
+    message: str
+    results: List[ResponseModel]  # One per entry, in request order; data holds job_id, original_csv_filename and csv_row_index
\ No newline at end of file
@@ -1,5 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
-from typing import List, Optional, Any # Dict might not be needed directly in signatures now
+import asyncio
+import hashlib
+import heapq
+import io
+import json
+import time
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional, Any, Tuple # Dict might not be needed directly in signatures now
 
 # Import models from your models.py file
 from models import (
@@ -22,27 +30,47 @@ from models import (
 
     # For CSV processing
     CSVProcessResponse, # This is the response from /process-csv
-    TransactionEntry    # This is the model for an individual entry that /process-csv returns in a list,
+    CSVBatchProcessResponse, # Response from /process-csv-batch
+    CSVFileResult,
+    TransactionEntry,   # This is the model for an individual entry that /process-csv returns in a list,
                         # and also what /save-transaction will receive from the frontend.
+    BatchSaveResponse   # Response of /save-transactions, one ResponseModel per csv_row_index
 )
 
-# Your notionAPI functions (ensure these are correctly imported)
+# Your notionAPI functions (async variants, so Notion round trips don't block the event loop)
 from utils.notionAPI import (
-    list_accounts,
-    list_expense_types,
-    create_expense, # Takes parameters matching ExpenseCreatePayload
-    list_income_types,
-    create_income,  # Takes parameters matching IncomeCreatePayload
-    list_months,
-    list_subscriptions,
-    list_debts,
-    list_savings,
-    create_transfer # Takes parameters matching TransferCreatePayload
+    alist_accounts,
+    alist_expense_types,
+    acreate_expense, # Takes parameters matching ExpenseCreatePayload
+    alist_income_types,
+    acreate_income,  # Takes parameters matching IncomeCreatePayload
+    alist_months,
+    alist_subscriptions,
+    alist_debts,
+    alist_savings,
+    acreate_transfer, # Takes parameters matching TransferCreatePayload
+    count_notion_retries,
+    get_notion_client,
+    to_notion_thread
 )
+from utils.settings import ConfigurationError
+
+from utils.notionAPI import REFERENCE_CACHE_TTLS
+from utils.cache import reference_cache
+
+from utils.job_queue import get_job_queue, JOB_DONE, JOB_FAILED, JOB_INTERRUPTED, run_worker
+from utils.fingerprints import find_saved_page, get_fingerprint_index, sync_from_notion
+from utils.mirror import get_reference_mirror, MIRROR_SYNC_INTERVAL
+from utils import metrics
+from utils.metrics import CACHE_HITS, CACHE_MISSES, SAVE_JOB_DURATION, PhaseTimer, profile_call
 
 # Your CSV processing functions
 from utils.csv_processor import (
-    process_csv # Takes CSV content bytes and original filename
+    process_csv, # Takes CSV content bytes and original filename
+    stream_csv,  # Takes a binary file object, yields NDJSON lines
+    load_categorization_context,
+    parse_date,
+    reference_warnings
     # categorize_transaction is used internally by process_csv
     # get_month_from_date is used internally
     # update_csv_with_loaded_flag is REMOVED
@@ -58,68 +86,278 @@ async def root():
         message="Financial Management API is running"
     )
 
+# ==================== Start-up ====================
+WARM_UP_CONNECTIONS = 4 # Notion connections opened ahead of the first request
+
+async def warm_up():
+    """
+    Background start-up task, started in the app lifespan: opens Notion connections and
+    loads the categorization data and the duplicate index, so the first upload is warm.
+    """
+    try:
+        await to_notion_thread(get_notion_client().warm_up, WARM_UP_CONNECTIONS)
+        await asyncio.to_thread(load_categorization_context)
+        await asyncio.to_thread(get_fingerprint_index)
+        print("Backend warmed up")
+    except ConfigurationError as e:
+        print(f"Configuration error: {e}")
+    except Exception as e:
+        print(f"Error warming up: {type(e).__name__} - {str(e)}")
+
 # ==================== Listing Routes (GET) ====================
+# Served from the local mirror of the Notion databases (see utils/mirror.py), with its
+# last sync time in the X-Mirror-Synced-At header. Until a database is first synced,
+# its route falls back to a (cached) live Notion query.
+# Bodies carry an ETag (hash of the JSON), so clients revalidating with If-None-Match
+# get an empty 304 when the list didn't change.
+MIRROR_SYNCED_HEADER = "X-Mirror-Synced-At"
+REFERENCE_CACHE_CONTROL = "no-cache"  # Clients may store the lists but must revalidate them
+
+# database -> (synced_at, JSON body, ETag), so a list is serialized once per mirror sync
+_serialized_lists: Dict[str, Tuple[str, bytes, str]] = {}
+
+def serialize_list(items: List[Any]) -> Tuple[bytes, str]:
+    """JSON body of a list and its ETag"""
+    body = json.dumps(items, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return body, f'"{hashlib.sha1(body).hexdigest()}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the If-None-Match header of the request matches etag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+async def reference_list_body(database: str, live_loader) -> Tuple[Optional[str], bytes, str]:
+    """(synced_at, JSON body, ETag) of a reference list, synced_at None when read live from Notion"""
+    mirror = get_reference_mirror()
+    synced_at = mirror.synced_at(database)
+    cached = _serialized_lists.get(database)
+    (CACHE_MISSES if synced_at is None else CACHE_HITS).inc(cache="mirror", database=database)
+    if synced_at is None:
+        body, etag = serialize_list(await live_loader())
+    elif cached and cached[0] == synced_at:
+        _, body, etag = cached
+    else:
+        body, etag = serialize_list(mirror.read(database))
+        _serialized_lists[database] = (synced_at, body, etag)
+    return synced_at, body, etag
+
+async def mirrored_list(database: str, request: Request, live_loader) -> Response:
+    synced_at, body, etag = await reference_list_body(database, live_loader)
+    headers = {"ETag": etag, "Cache-Control": REFERENCE_CACHE_CONTROL}
+    if synced_at:
+        headers[MIRROR_SYNCED_HEADER] = synced_at
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
 @router.get("/accounts", response_model=List[AccountBase])
-async def get_accounts_route(): # Renamed to avoid conflict if you had a function named get_accounts
+async def get_accounts_route(request: Request): # Renamed to avoid conflict if you had a function named get_accounts
     try:
-        return list_accounts()
+        return await mirrored_list("accounts", request, alist_accounts)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/expense-types", response_model=List[ExpenseTypeBase])
-async def get_expense_types_route():
+async def get_expense_types_route(request: Request):
     try:
-        return list_expense_types()
+        return await mirrored_list("expense_types", request, alist_expense_types)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/income-types", response_model=List[IncomeTypeBase])
-async def get_income_types_route():
+async def get_income_types_route(request: Request):
     try:
-        return list_income_types()
+        return await mirrored_list("income_types", request, alist_income_types)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/months", response_model=List[MonthBase])
-async def get_months_route():
+async def get_months_route(request: Request):
     try:
-        return list_months()
+        return await mirrored_list("months", request, alist_months)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/subscriptions", response_model=List[SubscriptionBase])
-async def get_subscriptions_route():
+async def get_subscriptions_route(request: Request):
     try:
-        return list_subscriptions()
+        return await mirrored_list("subscriptions", request, alist_subscriptions)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/debts", response_model=List[DebtBase])
-async def get_debts_route():
+async def get_debts_route(request: Request):
     try:
-        return list_debts()
+        return await mirrored_list("debts", request, alist_debts)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/savings", response_model=List[SavingBase])
-async def get_savings_route():
+async def get_savings_route(request: Request):
+    try:
+        return await mirrored_list("savings", request, alist_savings)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ==================== Reference Data Cache ====================
+@router.get("/cache/stats", response_model=ResponseModel)
+async def cache_stats_route():
+    return ResponseModel(
+        status="success",
+        message="Reference data cache statistics",
+        data=reference_cache.stats()
+    )
+
+@router.post("/cache/invalidate", response_model=ResponseModel)
+async def invalidate_cache_route(database: Optional[str] = None):
+    """
+    Drops cached reference data so the next request re-reads it from Notion.
+    Pass ?database=accounts (expense_types, months, ...) to only drop one list.
+    """
+    if database is not None and database not in REFERENCE_CACHE_TTLS:
+        raise HTTPException(status_code=400, detail=f"Unknown database: {database}")
+    reference_cache.invalidate(database)
+    return ResponseModel(
+        status="success",
+        message=f"Invalidated cache for {database or 'all databases'}",
+        data=reference_cache.stats()
+    )
+
+# Loaders of /bootstrap, in the order of its sections
+BOOTSTRAP_LOADERS = {
+    "accounts": alist_accounts,
+    "expense_types": alist_expense_types,
+    "income_types": alist_income_types,
+    "months": alist_months,
+    "subscriptions": alist_subscriptions,
+    "debts": alist_debts,
+    "savings": alist_savings,
+}
+
+@router.get("/bootstrap")
+async def get_bootstrap_route(request: Request):
+    """
+    Every reference list in one response, so the frontend starts with a single round trip:
+    {"accounts": {"version", "synced_at", "items"}, "expense_types": ..., ...}.
+    version is the ETag of the section's listing route. The lists are gathered concurrently
+    and their cached JSON bodies are spliced in as is. GZipMiddleware compresses the document.
+    """
     try:
-        return list_savings()
+        bodies = await asyncio.gather(*(
+            reference_list_body(database, loader) for database, loader in BOOTSTRAP_LOADERS.items()
+        ))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    sections = []
+    for database, (synced_at, body, etag) in zip(BOOTSTRAP_LOADERS, bodies):
+        version = etag.strip('"')
+        sections.append(
+            f'"{database}":{{"version":"{version}","synced_at":{json.dumps(synced_at)},"items":'.encode() + body + b"}"
+        )
+    # Weak: the document also holds the sync times, which don't change the data
+    section_etags = "".join(section_etag for _, _, section_etag in bodies)
+    etag = f'W/"{hashlib.sha1(section_etags.encode()).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": REFERENCE_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(b"{" + b",".join(sections) + b"}", media_type="application/json", headers=headers)
+
+
+# ==================== Reference Data Mirror ====================
+@router.get("/mirror/status", response_model=ResponseModel)
+async def mirror_status_route():
+    return ResponseModel(
+        status="success",
+        message="Reference data mirror status",
+        data=get_reference_mirror().status()
+    )
+
+@router.post("/mirror/sync", response_model=ResponseModel)
+async def sync_mirror_route(full: bool = False):
+    """
+    Syncs the mirror now instead of waiting for the background loop.
+    Pass ?full=true after deleting rows in Notion, incremental syncs can't see deletions.
+    """
+    report = await to_notion_thread(get_reference_mirror().sync_all, full)
+    failed = [name for name, result in report.items() if "error" in result]
+    return ResponseModel(
+        status="error" if failed else "success",
+        message=f"Failed to sync {', '.join(failed)}" if failed else f"Synced {len(report)} databases",
+        data=report
+    )
+
+async def run_mirror_sync():
+    """Background loop keeping the reference data mirror current, started in the app lifespan"""
+    mirror = get_reference_mirror()
+    while True:
+        try:
+            await to_notion_thread(mirror.sync_all)
+        except Exception as e:
+            print(f"Error syncing reference mirror: {type(e).__name__} - {str(e)}")
+        await asyncio.sleep(MIRROR_SYNC_INTERVAL)
 
 
 # ==================== CSV Processing Route ====================
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+PROFILE_TOP_N = 30 # Functions listed by ?profile=1
+
 @router.post("/process-csv", response_model=CSVProcessResponse)
-async def process_csv_file_route(file: UploadFile = File(...)):
+async def process_csv_file_route(
+    request: Request, file: UploadFile = File(...), engine: str = "rows", workers: int = 1, profile: bool = False
+):
+    """
+    Categorizes an uploaded CSV. With `Accept: application/x-ndjson` the entries are
+    streamed as they are categorized (file order), followed by a {"stats": ...} record;
+    streaming always uses the rows engine in this process, so ?engine, ?workers and
+    ?profile are rejected with it.
+    Pass ?engine=columnar to use the batch engine and ?workers=N to categorize very large
+    files in N processes (capped at the number of CPUs).
+    The time of each phase is returned in `timings` and in a Server-Timing header (browser
+    devtools, Network > Timing), which also has the time spent serializing the response.
+    ?profile=1 adds the top functions of a cProfile run in `profile` (this process only,
+    not the ?workers=N ones).
+    """
+    streaming = NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+    if streaming and (engine != "rows" or workers != 1 or profile):
+        raise HTTPException(
+            status_code=400,
+            detail="Streaming (Accept: application/x-ndjson) always uses the rows engine in this process, drop ?engine, ?workers and ?profile"
+        )
     try:
+        if streaming:
+            lines = await run_in_threadpool(stream_csv, file.file, file.filename)
+            # The upload is closed once this handler returns, before the body is streamed:
+            # hand its spooled file over to the stream (which closes it) and leave a stub behind.
+            file.file = io.BytesIO()
+            # Content-Encoding: identity keeps GZipMiddleware from buffering the lines
+            return StreamingResponse(lines, media_type=NDJSON_MEDIA_TYPE, headers={"Content-Encoding": "identity"})
+
         contents = await file.read()
         # The process_csv function in csv_processor.py should now take 'contents' and 'file.filename'
         # and return a dictionary matching CSVProcessResponse structure.
-        processed_data_dict = process_csv(contents, file.filename)
+        # process_csv is blocking (Notion fetches + categorization), run it off the event loop
+        if profile:
+            processed_data_dict, profile_report = await run_in_threadpool(
+                profile_call, process_csv, contents, file.filename, engine, workers, top_n=PROFILE_TOP_N
+            )
+            processed_data_dict["profile"] = profile_report
+        else:
+            processed_data_dict = await run_in_threadpool(process_csv, contents, file.filename, engine, workers)
 
-        # Validate and return (Pydantic handles validation here if types match)
-        return CSVProcessResponse(**processed_data_dict)
+        # Validate and serialize here rather than in FastAPI, so those phases are timed too
+        timer = PhaseTimer(processed_data_dict.pop("timings"))
+        with timer.phase("validate"):
+            response = CSVProcessResponse(**processed_data_dict)
+        response.timings = dict(timer.timings)
+        # serialize is only known once the body exists, it is reported in the header only
+        with timer.phase("serialize"):
+            body = response.model_dump_json()
+        return Response(body, media_type="application/json", headers={"Server-Timing": timer.server_timing()})
     except ValueError as ve: # Catch specific errors like missing CSV headers
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
@@ -128,15 +366,77 @@ async def process_csv_file_route(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Error processing CSV: {str(e)}")
 
 
-# ==================== Save Transaction Route ====================
-@router.post("/save-transaction", response_model=ResponseModel)
-async def save_transaction_route(transaction: TransactionEntry):
+@router.post("/process-csv-batch", response_model=CSVBatchProcessResponse)
+async def process_csv_batch_route(files: List[UploadFile] = File(...), engine: str = "rows"):
     """
-    Receives a processed transaction entry from the frontend (which originated from the CSV)
-    and saves it to the appropriate Notion database.
+    Categorizes several CSV files (e.g. one per account/card) concurrently, sharing a single
+    Notion reference data fetch. Returns per-file stats and all entries merged by date.
+    """
+    try:
+        context, reference_errors = await run_in_threadpool(load_categorization_context)
+    except Exception as e:
+        print(f"Error loading Notion data: {type(e).__name__} - {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing CSV: {str(e)}")
+
+    async def process_one(file: UploadFile):
+        try:
+            contents = await file.read()
+            result = await run_in_threadpool(process_csv, contents, file.filename, engine, 1, context)
+            return CSVFileResult(filename=file.filename, status="success", message=result["message"], stats=result["stats"]), result["entries"]
+        except Exception as e: # One bad file shouldn't fail the others
+            print(f"Error processing CSV {file.filename}: {type(e).__name__} - {str(e)}")
+            return CSVFileResult(filename=file.filename, status="error", message=str(e)), []
+
+    results = await asyncio.gather(*(process_one(file) for file in files))
+    file_results = [file_result for file_result, _ in results]
+
+    # Each file's entries are already sorted by date, merge them with the same key (dates
+    # without zero padding like 2024-5-3 don't sort as strings)
+    entries = list(heapq.merge(*(file_entries for _, file_entries in results), key=lambda x: parse_date(x["date"])))
+
+    failed = sum(1 for file_result in file_results if file_result.status != "success")
+    if failed == 0:
+        status = "success"
+    elif failed == len(file_results):
+        status = "error"
+    else:
+        status = "partial"
+
+    return CSVBatchProcessResponse(
+        status=status,
+        message=f"Processed {len(file_results) - failed} of {len(file_results)} files, {len(entries)} entries.",
+        entries=entries,
+        files=file_results,
+        warnings=reference_warnings(reference_errors)
+    )
+
+
+# ==================== Save Transaction Routes ====================
+SAVE_WORKER_CONCURRENCY = 4 # Parallel Notion writes, the client's token bucket keeps them at ~3 req/s
+
+
+async def save_transaction_entry(transaction: TransactionEntry) -> ResponseModel:
+    """
+    Saves a processed transaction entry (which originated from the CSV)
+    to the appropriate Notion database.
     """
     # print("aaaaaaaaaaaaaaaaaaa")
     # print("Received transaction for saving:", transaction.dict()) # For debugging
+    with count_notion_retries() as retry_counter:
+        result = await _save_transaction_entry(transaction, retry_counter)
+    if result.status == "success":
+        # Remember the transaction (one row per Notion page) so later uploads containing it skip it
+        try:
+            await asyncio.to_thread(
+                get_fingerprint_index().add, result.data["notion_response"]["id"],
+                transaction.date, transaction.concept, transaction.amount, transaction.account_id
+            )
+        except Exception as e:
+            # The page exists: the save stays a success, the next fingerprint sync picks the page up
+            print(f"Error indexing saved transaction '{transaction.name}': {type(e).__name__} - {str(e)}")
+    return result
+
+async def _save_transaction_entry(transaction: TransactionEntry, retry_counter) -> ResponseModel:
     try:
         result = None
         notion_response_data = None # To store the actual Notion response
@@ -157,7 +457,7 @@ async def save_transaction_route(transaction: TransactionEntry):
                 subs=transaction.subs
             )
             
-            notion_response_data = create_expense(**payload.dict(exclude_none=True))
+            notion_response_data = await acreate_expense(**payload.dict(exclude_none=True))
         elif transaction.type == "income":
             payload = IncomeCreatePayload(
                 date=transaction.date,
@@ -168,7 +468,7 @@ async def save_transaction_route(transaction: TransactionEntry):
                 month_id=transaction.month_id,
                 income_type_id=transaction.income_type_id
             )
-            notion_response_data = create_income(**payload.dict(exclude_none=True))
+            notion_response_data = await acreate_income(**payload.dict(exclude_none=True))
         elif transaction.type == "transfer":
             payload = TransferCreatePayload(
                 date=transaction.date,
@@ -181,7 +481,7 @@ async def save_transaction_route(transaction: TransactionEntry):
                 transfer_type=transaction.transfer_type,
                 month_id=transaction.month_id
             )
-            notion_response_data = create_transfer(**payload.dict(exclude_none=True))
+            notion_response_data = await acreate_transfer(**payload.dict(exclude_none=True))
         else:
             raise HTTPException(status_code=400, detail=f"Unknown transaction type: {transaction.type}")
 
@@ -194,7 +494,10 @@ async def save_transaction_route(transaction: TransactionEntry):
             return ResponseModel(
                 status="error",
                 message=f"Notion API Error: {error_message}",
-                data=notion_response_data # Send full Notion error back if helpful
+                data={
+                    "notion_response": notion_response_data, # Send full Notion error back if helpful
+                    "retries": retry_counter.retries
+                }
             )
             # Alternative: raise HTTPException(status_code=502, detail=f"Notion API Error: {error_message}")
 
@@ -202,11 +505,141 @@ async def save_transaction_route(transaction: TransactionEntry):
         return ResponseModel(
             status="success",
             message=f"{transaction.type.capitalize()} '{transaction.name}' created successfully in Notion.",
-            data=notion_response_data # Return the Notion page object
+            data={
+                "notion_response": notion_response_data, # The Notion page object
+                "retries": retry_counter.retries # Retries needed because of throttling/transient errors
+            }
         )
     except ValueError as ve: # e.g. float conversion error
         raise HTTPException(status_code=400, detail=f"Invalid data for transaction: {str(ve)}")
     except Exception as e:
         print(f"Error saving transaction: {type(e).__name__} - {str(e)}")
         # traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Error saving transaction: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error saving transaction: {str(e)}")
+
+async def resume_save_job(transaction: TransactionEntry) -> Optional[Tuple[str, ResponseModel]]:
+    """
+    For a save interrupted by a shutdown/crash, whose Notion page may already exist:
+    (status, result) if it must not be saved again, None if Notion doesn't have it.
+    """
+    try:
+        page_id = await to_notion_thread(find_saved_page, transaction.model_dump())
+    except Exception as e:
+        print(f"Error checking interrupted save of '{transaction.name}': {type(e).__name__} - {str(e)}")
+        return JOB_INTERRUPTED, ResponseModel(
+            status="error",
+            message=f"Save interrupted, check in Notion whether '{transaction.name}' was saved before saving it again ({str(e)})"
+        )
+    if page_id is None:
+        return None
+    return JOB_DONE, ResponseModel(
+        status="success",
+        message=f"{transaction.type.capitalize()} '{transaction.name}' was already in Notion, not saved again.",
+        data={"notion_response": {"id": page_id}, "retries": 0, "resumed": True}
+    )
+
+async def run_save_job(payload: dict, attempts: int = 1):
+    """Job queue handler: saves one queued TransactionEntry to Notion"""
+    transaction = TransactionEntry(**payload)
+    start = time.perf_counter()
+    # attempts > 1: an earlier run was cut short, maybe after Notion created the page
+    resumed = await resume_save_job(transaction) if attempts > 1 else None
+    if resumed:
+        status, result = resumed
+    else:
+        try:
+            result = await save_transaction_entry(transaction)
+        except HTTPException as he: # Invalid entry or unexpected error, keep it in the job result
+            result = ResponseModel(status="error", message=str(he.detail))
+        status = JOB_DONE if result.status == "success" else JOB_FAILED
+    SAVE_JOB_DURATION.observe(time.perf_counter() - start, type=transaction.type, status=result.status)
+    return status, result.model_dump()
+
+async def run_save_worker():
+    """Background worker draining the save queue into Notion, started in the app lifespan"""
+    job_queue = await asyncio.to_thread(get_job_queue)  # Durable queue of saves, in the local state file
+    requeued = await asyncio.to_thread(job_queue.requeue_running)
+    if requeued:
+        print(f"Resuming {requeued} interrupted save jobs")
+    await run_worker(job_queue, run_save_job, concurrency=SAVE_WORKER_CONCURRENCY)
+
+@router.post("/save-transaction", response_model=ResponseModel)
+async def save_transaction_route(transaction: TransactionEntry):
+    """
+    Receives a processed transaction entry from the frontend (which originated from the CSV)
+    and queues it to be saved to the appropriate Notion database by the background worker.
+    Poll GET /jobs/{job_id} for the outcome.
+    """
+    # SQLite writes can wait on the file lock, keep them off the event loop
+    job_id = await asyncio.to_thread(get_job_queue().enqueue, transaction.model_dump())
+    return ResponseModel(
+        status="queued",
+        message=f"{transaction.type.capitalize()} '{transaction.name}' queued for saving to Notion.",
+        data={"job_id": job_id}
+    )
+
+@router.post("/save-transactions", response_model=BatchSaveResponse)
+async def save_transactions_route(transactions: List[TransactionEntry]):
+    """
+    Queues several entries at once. The background worker saves them SAVE_WORKER_CONCURRENCY
+    at a time, throttled by the Notion client's rate limiter. Results come in request order,
+    with the entry's file and row: entries of /process-csv-batch repeat row indexes across files.
+    """
+    job_ids = await asyncio.to_thread(get_job_queue().enqueue_many, [transaction.model_dump() for transaction in transactions])
+    return BatchSaveResponse(
+        status="queued",
+        message=f"Queued {len(job_ids)} transactions for saving to Notion.",
+        results=[
+            ResponseModel(status="queued", message="Queued", data={
+                "job_id": job_id,
+                "original_csv_filename": transaction.original_csv_filename,
+                "csv_row_index": transaction.csv_row_index
+            })
+            for transaction, job_id in zip(transactions, job_ids)
+        ]
+    )
+
+@router.get("/jobs/{job_id}", response_model=ResponseModel)
+async def get_job_route(job_id: str):
+    job = await asyncio.to_thread(get_job_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return ResponseModel(
+        status="success",
+        message=f"Job {job_id} is {job['status']}",
+        data=job # result holds the save outcome once the job is done/failed
+    )
+
+
+# ==================== Duplicate index ====================
+FINGERPRINT_SYNC_INTERVAL = 3600  # Seconds between two harvests of the Notion transactions
+
+@router.post("/fingerprints/sync", response_model=ResponseModel)
+async def sync_fingerprints_route():
+    """
+    Harvests the Expenses, Incomes and Transfers already in Notion into the duplicate index.
+    Only pages edited since the previous harvest are fetched, the first run reads them all.
+    """
+    report = await to_notion_thread(sync_from_notion)
+    failed = [name for name, result in report.items() if "error" in result]
+    return ResponseModel(
+        status="error" if failed else "success",
+        message=f"Failed to harvest {', '.join(failed)}" if failed else f"Index holds {len(get_fingerprint_index())} transactions",
+        data=report
+    )
+
+async def run_fingerprint_sync():
+    """Background loop keeping the duplicate index current, started in the app lifespan"""
+    while True:
+        try:
+            await to_notion_thread(sync_from_notion)
+        except Exception as e:
+            print(f"Error syncing fingerprints: {type(e).__name__} - {str(e)}")
+        await asyncio.sleep(FINGERPRINT_SYNC_INTERVAL)
+
+
+# ==================== Metrics ====================
+@router.get("/metrics")
+async def metrics_route():
+    """Notion call latencies, rate limiting, caches and request durations, in Prometheus text format"""
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# The backend is run from its own directory (python -m uvicorn main:app), import it the same way
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND_DIR)
+
+from utils.settings import settings  # noqa: E402
+
+
+@pytest.fixture
+def state_path(tmp_path, monkeypatch):
+    """Fresh SQLite state file, also set as settings.state_path for the duration of the test"""
+    path = str(tmp_path / "state.sqlite3")
+    # configure() updates these in place, give the test its own copies
+    monkeypatch.setattr(settings, "_overrides", settings.overrides())
+    monkeypatch.setattr(settings, "_values", {})
+    settings.configure(state_path=path)
+    return path
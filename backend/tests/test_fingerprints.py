@@ -0,0 +1,89 @@
+import asyncio
+import sqlite3
+
+from utils.csv_processor import IMPORTED, POSSIBLE_DUPLICATE, ImportedTransactions, new_stats, review_entries
+from utils.fingerprints import BloomFilter, FingerprintIndex, transaction_fingerprint
+
+
+def metro_ticket(**fields):
+    entry = {"type": "expense", "date": "2024-05-02", "concept": "TARGETA *1234 TMB METRO", "amount": "2.55",
+             "account_id": "account-main", "name": "TMB METRO"}
+    entry.update(fields)
+    return entry
+
+
+def test_fingerprint_normalizes_concept_and_amount_sign():
+    assert transaction_fingerprint("2024-05-02", "TMB  metro", "-2.55", "a") == transaction_fingerprint("2024-05-02", "tmb metro", 2.55, "a")
+    assert transaction_fingerprint("2024-05-02", "tmb metro", "2.55", "a") != transaction_fingerprint("2024-05-02", "tmb metro", "2.55", "b")
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000)
+    digests = [transaction_fingerprint("2024-01-01", f"concept {i}", i, None) for i in range(1000)]
+    for digest in digests:
+        bloom.add(digest)
+    assert all(digest in bloom for digest in digests)
+
+
+def test_add_contains_round_trip(state_path):
+    index = FingerprintIndex(state_path)
+    assert not index.contains("2024-05-02", "TMB METRO", "2.55", "account-main")
+    assert index.add("page-1", "2024-05-02", "TMB METRO", "-2.55", "account-main")
+    assert not index.add("page-1", "2024-05-02", "TMB METRO", "-2.55", "account-main")  # Same page again
+    assert index.contains("2024-05-02", "tmb metro", "2.55", "account-main")
+    assert not index.contains("2024-05-02", "TMB METRO", "2.55", "account-other")
+    assert len(index) == 1
+
+    # Reopened from the file, with the filter rebuilt from the table
+    reopened = FingerprintIndex(state_path)
+    assert reopened.contains("2024-05-02", "TMB METRO", "2.55", "account-main")
+    assert len(reopened) == 1
+
+
+def test_identical_movements_keep_one_row_per_page(state_path):
+    index = FingerprintIndex(state_path)
+    index.add_many([("page-1", "2024-05-02", "TMB METRO", "2.55", "a"), ("page-2", "2024-05-02", "TMB METRO", "2.55", "a")])
+    assert sorted(index.page_ids(transaction_fingerprint("2024-05-02", "TMB METRO", "2.55", "a"))) == ["page-1", "page-2"]
+
+
+def test_index_without_page_ids_is_rebuilt(state_path):
+    conn = sqlite3.connect(state_path)
+    conn.execute("CREATE TABLE imported_transactions (fingerprint TEXT PRIMARY KEY, date TEXT)")
+    conn.execute("CREATE TABLE sync_state (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    conn.execute("INSERT INTO imported_transactions VALUES ('f', '2024-05-02')")
+    conn.execute("INSERT INTO sync_state VALUES ('expenses', '2024-05-02T00:00:00.000Z')")
+    conn.commit()
+    conn.close()
+
+    index = FingerprintIndex(state_path)
+    assert len(index) == 0
+    assert index.get_mark("expenses") is None  # The next harvest starts over
+
+
+def test_match_absorbs_one_row_per_saved_page(state_path):
+    index = FingerprintIndex(state_path)
+    index.add("page-1", "2024-05-02", "TARGETA *1234 TMB METRO", "2.55", "account-main")
+    imported = ImportedTransactions(index)
+
+    assert imported.match(metro_ticket()) == IMPORTED
+    assert imported.match(metro_ticket()) == POSSIBLE_DUPLICATE  # Second ticket of the day, not saved
+    assert imported.match(metro_ticket(date="2024-05-03")) is None
+
+
+def test_match_transfers_by_their_name(state_path):
+    # Harvested transfers only have their title, the entry name
+    index = FingerprintIndex(state_path)
+    index.add("page-1", "2024-05-02", "Savings", "100.00", "account-main", source="notion:transfers")
+    transfer = metro_ticket(type="transfer", concept="TRASPAS A ESTALVI", name="Savings", amount="100.00")
+    assert ImportedTransactions(index).match(transfer) == IMPORTED
+
+
+def test_review_entries_counts_skipped_and_flags_duplicates(state_path):
+    index = FingerprintIndex(state_path)
+    index.add("page-1", "2024-05-02", "TARGETA *1234 TMB METRO", "2.55", "account-main")
+    stats = new_stats()
+
+    entries = list(review_entries([metro_ticket(), metro_ticket(), metro_ticket(date="2024-05-03")], stats, ImportedTransactions(index)))
+    assert stats["already_imported"] == 1
+    assert stats["processed_for_review"] == 2
+    assert [entry.get("possible_duplicate", False) for entry in entries] == [True, False]
@@ -0,0 +1,65 @@
+import asyncio
+
+from utils.job_queue import JOB_DONE, JOB_FAILED, JOB_PENDING, JOB_RUNNING, JobQueue, run_worker
+
+
+def test_claim_returns_oldest_pending_job(state_path):
+    queue = JobQueue(state_path)
+    first, second = queue.enqueue_many([{"n": 1}, {"n": 2}])
+
+    assert queue.claim() == (first, {"n": 1}, 1)
+    assert queue.claim() == (second, {"n": 2}, 1)
+    assert queue.claim() is None
+    assert queue.counts() == {JOB_RUNNING: 2}
+
+
+def test_complete_stores_status_and_result(state_path):
+    queue = JobQueue(state_path)
+    job_id = queue.enqueue({"n": 1})
+    queue.claim()
+    queue.complete(job_id, JOB_DONE, {"status": "success"})
+
+    job = queue.get(job_id)
+    assert job["status"] == JOB_DONE
+    assert job["payload"] == {"n": 1}
+    assert job["result"] == {"status": "success"}
+    assert queue.claim() is None
+
+
+def test_requeue_running_resumes_jobs_with_their_attempts(state_path):
+    queue = JobQueue(state_path)
+    running, pending = queue.enqueue_many([{"n": 1}, {"n": 2}])
+    queue.claim()
+
+    # The backend stops with a job running, the next start opens the same file
+    restarted = JobQueue(state_path)
+    assert restarted.requeue_running() == 1
+    assert restarted.get(running)["status"] == JOB_PENDING
+    assert restarted.claim() == (running, {"n": 1}, 2)
+    assert restarted.claim() == (pending, {"n": 2}, 1)
+
+
+def test_get_unknown_job(state_path):
+    assert JobQueue(state_path).get("missing") is None
+
+
+def test_run_worker_completes_jobs_and_survives_handler_errors(state_path):
+    queue = JobQueue(state_path)
+    ok, broken = queue.enqueue_many([{"ok": True}, {"ok": False}])
+
+    async def handler(payload, attempts):
+        if not payload["ok"]:
+            raise RuntimeError("boom")
+        return JOB_DONE, {"attempts": attempts}
+
+    async def drain():
+        worker = asyncio.create_task(run_worker(queue, handler, concurrency=2, poll_interval=0.01))
+        while queue.counts().get(JOB_PENDING) or queue.counts().get(JOB_RUNNING):
+            await asyncio.sleep(0.01)
+        worker.cancel()
+
+    asyncio.run(asyncio.wait_for(drain(), timeout=10))
+    assert queue.get(ok)["status"] == JOB_DONE
+    assert queue.get(ok)["result"] == {"attempts": 1}
+    assert queue.get(broken)["status"] == JOB_FAILED
+    assert queue.get(broken)["result"] == {"status": "error", "message": "boom"}
@@ -0,0 +1,121 @@
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+import uvicorn
+
+from utils import notionAPI
+from utils.mirror import ReferenceMirror
+from utils.notionAPI import NotionAPIError, NotionClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "benchmarks"))
+from fake_notion import FAKE_DATABASE_IDS, FaultConfig, create_app  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def fake_notion():
+    """benchmarks/fake_notion.py served on a free local port, yields (base url, FakeNotion)"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    app = create_app(FaultConfig())
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}/v1", app.state.notion
+    server.should_exit = True
+    thread.join()
+
+
+@pytest.fixture
+def notion(fake_notion, state_path, monkeypatch):
+    base_url, fake = fake_notion
+    fake.reset()
+    fake.config.error_rate = 0
+    # Distinct edit times, like rows edited over time
+    for position, page in enumerate(fake.databases[FAKE_DATABASE_IDS["ACCOUNTS"]]):
+        page["last_edited_time"] = f"2024-01-01T00:00:{position:02d}.000Z"
+    for name, database_id in FAKE_DATABASE_IDS.items():
+        monkeypatch.setenv(f"{name}_DATABASE_ID", database_id)
+    client = NotionClient({"Authorization": "Bearer test"}, base_url=base_url, max_attempts=2, backoff_base=0)
+    monkeypatch.setattr(notionAPI, "_notion_client", client)
+    return fake
+
+
+def accounts(fake):
+    return fake.databases[FAKE_DATABASE_IDS["ACCOUNTS"]]
+
+
+def rename(page, name, edited_at):
+    page["properties"]["Account Name"] = {"type": "title", "title": [{"type": "text", "text": {"content": name}, "plain_text": name}]}
+    page["last_edited_time"] = edited_at
+
+
+def test_first_sync_is_full_and_keeps_notion_order(notion, state_path):
+    mirror = ReferenceMirror(state_path)
+    assert mirror.read("accounts") is None
+
+    assert mirror.sync("accounts") == {"full": True, "fetched": 2}
+    assert mirror.read("accounts") == [{"id": "account-main", "name": "Main Account Name"}, {"id": "account-savings", "name": "Savings"}]
+    assert mirror.status()["accounts"]["high_water"] == "2024-01-01T00:00:01.000Z"
+
+
+def test_incremental_sync_upserts_edited_rows(notion, state_path):
+    mirror = ReferenceMirror(state_path)
+    mirror.sync("accounts")
+
+    rename(accounts(notion)[0], "Main Account", "2024-02-01T00:00:00.000Z")
+    new_page = dict(accounts(notion)[1], id="account-new", properties={})
+    rename(new_page, "Brokerage", "2024-02-02T00:00:00.000Z")
+    accounts(notion).append(new_page)
+
+    result = mirror.sync("accounts")
+    assert result["full"] is False
+    assert result["fetched"] == 3  # The two edits, and the row at the previous high-water mark
+    assert mirror.read("accounts") == [
+        {"id": "account-main", "name": "Main Account"},
+        {"id": "account-savings", "name": "Savings"},
+        {"id": "account-new", "name": "Brokerage"},
+    ]
+    assert mirror.status()["accounts"]["high_water"] == "2024-02-02T00:00:00.000Z"
+
+
+def test_cleared_title_is_dropped_incrementally(notion, state_path):
+    mirror = ReferenceMirror(state_path)
+    mirror.sync("accounts")
+
+    page = accounts(notion)[1]
+    page["properties"]["Account Name"]["title"] = []
+    page["last_edited_time"] = "2024-02-01T00:00:00.000Z"
+
+    assert mirror.sync("accounts")["full"] is False
+    assert [item["id"] for item in mirror.read("accounts")] == ["account-main"]
+
+
+def test_deleted_rows_go_away_on_the_next_full_sync(notion, state_path):
+    mirror = ReferenceMirror(state_path)
+    mirror.sync("accounts")
+    del accounts(notion)[0]
+
+    mirror.sync("accounts")  # An edit-time query never returns deleted rows
+    assert len(mirror.read("accounts")) == 2
+
+    assert mirror.sync("accounts", full=True)["full"] is True
+    assert mirror.read("accounts") == [{"id": "account-savings", "name": "Savings"}]
+
+
+def test_failed_sync_leaves_the_mirror_untouched(notion, state_path):
+    mirror = ReferenceMirror(state_path)
+    mirror.sync("accounts")
+    before = mirror.read("accounts")
+
+    notion.config.error_rate = 1  # Every request answered with a 5xx
+    with pytest.raises(NotionAPIError):
+        mirror.sync("accounts", full=True)
+    assert mirror.read("accounts") == before
+    assert "error" in mirror.sync_all()["accounts"]
@@ -0,0 +1,88 @@
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from utils.notionAPI import NotionClient, count_notion_retries
+
+URL = "http://notion.test/v1"
+
+
+def response(status):
+    result = requests.Response()
+    result.status_code = status
+    result.headers["Retry-After"] = "0"
+    result._content = b'{"object": "error", "message": "injected"}' if status >= 400 else b'{"object": "page", "id": "page-1"}'
+    return result
+
+
+def refused():
+    """What requests raises when no connection could be opened: the request never left"""
+    reason = NewConnectionError(None, "Failed to establish a new connection: [Errno 111] Connection refused")
+    return requests.ConnectionError(MaxRetryError(None, URL, reason))
+
+
+def dropped():
+    """What requests raises when the connection drops after the request was sent"""
+    return requests.ConnectionError(ProtocolError("Connection aborted.", ConnectionResetError(104, "reset")))
+
+
+def client_answering(monkeypatch, outcome):
+    """Client whose first attempt gets outcome (a status or an exception), every later one a 200"""
+    client = NotionClient({}, base_url=URL, max_attempts=3, backoff_base=0)
+    attempts = []
+
+    def request(method, url, **kwargs):
+        attempts.append(url)
+        if len(attempts) > 1:
+            return response(200)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return response(outcome)
+
+    monkeypatch.setattr(client.session, "request", request)
+    return client, attempts
+
+
+def attempts_of(call, client, attempts):
+    with count_notion_retries() as counter:
+        try:
+            call(client)
+        except requests.RequestException:
+            pass
+    assert counter.retries == len(attempts) - 1
+    return len(attempts)
+
+
+create_page = lambda client: client.create_page({"parent": {"database_id": "db"}})
+query_database = lambda client: client.query_database("db")
+get_database = lambda client: client.get_database("db")
+
+
+@pytest.mark.parametrize("outcome, create_attempts, read_attempts", [
+    (200, 1, 1),
+    (400, 1, 1),
+    (429, 2, 2),
+    (503, 2, 2),
+    # Notion may have created the page before failing: never repeat the POST
+    (500, 1, 2),
+    (502, 1, 2),
+    (504, 1, 2),
+    (requests.ReadTimeout("read timed out"), 1, 2),
+    (dropped(), 1, 2),
+    # Nothing reached Notion, safe to send again
+    (refused(), 2, 2),
+    (requests.ConnectTimeout("connect timed out"), 2, 2),
+])
+def test_retry_decision(monkeypatch, outcome, create_attempts, read_attempts):
+    assert attempts_of(create_page, *client_answering(monkeypatch, outcome)) == create_attempts
+    assert attempts_of(query_database, *client_answering(monkeypatch, outcome)) == read_attempts
+    assert attempts_of(get_database, *client_answering(monkeypatch, outcome)) == read_attempts
+
+
+def test_gives_up_after_max_attempts(monkeypatch):
+    client = NotionClient({}, base_url=URL, max_attempts=3, backoff_base=0)
+    attempts = []
+    monkeypatch.setattr(client.session, "request", lambda method, url, **kwargs: attempts.append(url) or response(429))
+
+    assert client.create_page({})["object"] == "error"
+    assert len(attempts) == 3
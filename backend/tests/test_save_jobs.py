@@ -0,0 +1,111 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+import routes
+from utils import fingerprints, notionAPI
+from utils.fingerprints import FingerprintIndex
+from utils.job_queue import JOB_DONE, JOB_INTERRUPTED
+
+ENTRY = {
+    "type": "expense", "date": "2024-05-02", "amount": "2.55", "concept": "TARGETA *1234 TMB METRO",
+    "account_id": "account-main", "name": "TMB METRO", "original_csv_filename": "extract.csv", "csv_row_index": 0,
+}
+
+
+def notion_page(page_id, entry):
+    """Expenses page as Notion returns it for entry"""
+    return {
+        "id": page_id,
+        "last_edited_time": "2024-05-02T10:00:00.000Z",
+        "properties": {
+            "Date": {"type": "date", "date": {"start": entry["date"]}},
+            "Amount": {"type": "number", "number": float(entry["amount"])},
+            "Note": {"type": "rich_text", "rich_text": [{"plain_text": entry["concept"]}]},
+            "Accounts": {"type": "relation", "relation": [{"id": entry["account_id"]}]},
+        },
+    }
+
+
+class StubNotion:
+    """Records the created pages and answers queries with the given rows (or an error)"""
+
+    def __init__(self):
+        self.created = []
+        self.rows = []
+        self.error = None
+
+    async def create_expense(self, **fields):
+        self.created.append(fields)
+        return {"object": "page", "id": f"page-{len(self.created)}"}
+
+    def query_database(self, database_id, payload=None):
+        if self.error:
+            return {"object": "error", "message": self.error}
+        return {"results": self.rows, "has_more": False}
+
+
+@pytest.fixture
+def notion(state_path, monkeypatch):
+    stub = StubNotion()
+    monkeypatch.setenv("EXPENSES_DATABASE_ID", "db-expenses")
+    monkeypatch.setattr(routes, "acreate_expense", stub.create_expense)
+    monkeypatch.setattr(notionAPI, "get_notion_client", lambda: stub)
+    monkeypatch.setattr(fingerprints, "_index", FingerprintIndex(state_path))
+    return stub
+
+
+def run_save_job(entry, attempts):
+    return asyncio.run(routes.run_save_job(dict(entry), attempts))
+
+
+def test_first_attempt_saves_and_indexes(notion):
+    status, result = run_save_job(ENTRY, 1)
+    assert status == JOB_DONE
+    assert result["data"]["notion_response"]["id"] == "page-1"
+    assert fingerprints.get_fingerprint_index().contains(ENTRY["date"], ENTRY["concept"], ENTRY["amount"], ENTRY["account_id"])
+
+
+def test_resumed_job_already_indexed_is_not_saved_again(notion):
+    run_save_job(ENTRY, 1)
+    status, result = run_save_job(ENTRY, 2)
+    assert status == JOB_DONE
+    assert result["data"]["notion_response"]["id"] == "page-1"
+    assert len(notion.created) == 1
+
+
+def test_resumed_job_found_in_notion_is_not_saved_again(notion):
+    # Created by the interrupted run, which never got to index it
+    notion.rows = [notion_page("page-in-notion", ENTRY)]
+    status, result = run_save_job(ENTRY, 2)
+    assert status == JOB_DONE
+    assert result["data"]["notion_response"]["id"] == "page-in-notion"
+    assert notion.created == []
+    assert fingerprints.get_fingerprint_index().contains(ENTRY["date"], ENTRY["concept"], ENTRY["amount"], ENTRY["account_id"])
+
+
+def test_resumed_job_missing_everywhere_is_saved(notion):
+    notion.rows = [notion_page("other-day", {**ENTRY, "date": "2024-05-03"})]
+    status, _ = run_save_job(ENTRY, 2)
+    assert status == JOB_DONE
+    assert len(notion.created) == 1
+
+
+def test_resumed_job_is_interrupted_when_notion_cant_be_asked(notion):
+    notion.error = "Service unavailable"
+    status, result = run_save_job(ENTRY, 2)
+    assert status == JOB_INTERRUPTED
+    assert result["status"] == "error"
+    assert notion.created == []
+
+
+def test_index_error_keeps_the_save_done(notion, monkeypatch):
+    class LockedIndex:
+        def add(self, *args, **kwargs):
+            raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(routes, "get_fingerprint_index", lambda: LockedIndex())
+    status, result = run_save_job(ENTRY, 1)
+    assert status == JOB_DONE
+    assert result["data"]["notion_response"]["id"] == "page-1"
@@ -0,0 +1,95 @@
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import CACHE_HITS, CACHE_MISSES
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache where every key has its own TTL.
+    Keeps hit/miss counters per key so the cache efficiency can be inspected.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._entries: Dict[str, Dict[str, Any]] = {}  # key -> {"value", "loaded_at", "ttl"}
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def _fresh_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry["loaded_at"] < entry["ttl"]:
+            return entry
+        return None
+
+    def get_or_load(self, key: str, ttl: float, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for key, calling loader() if it is missing or expired"""
+        with self._lock:
+            entry = self._fresh_entry(key)
+            if entry:
+                self.hits[key] = self.hits.get(key, 0) + 1
+                CACHE_HITS.inc(cache="reference", database=key)
+                return entry["value"]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given key, the others wait and reuse its result
+        with load_lock:
+            with self._lock:
+                entry = self._fresh_entry(key)
+                if entry:
+                    self.hits[key] = self.hits.get(key, 0) + 1
+                    CACHE_HITS.inc(cache="reference", database=key)
+                    return entry["value"]
+                self.misses[key] = self.misses.get(key, 0) + 1
+                CACHE_MISSES.inc(cache="reference", database=key)
+
+            # A failed load raises and is not cached, anything returned (even []) is
+            value = loader()
+
+            with self._lock:
+                self._entries[key] = {"value": value, "loaded_at": time.monotonic(), "ttl": ttl}
+            return value
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one key, or every key if none is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and the age of every cached entry"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+                "entries": {
+                    key: {
+                        "age_seconds": round(now - entry["loaded_at"], 1),
+                        "ttl_seconds": entry["ttl"],
+                        "fresh": now - entry["loaded_at"] < entry["ttl"],
+                    }
+                    for key, entry in self._entries.items()
+                },
+            }
+
+
+# Shared cache for the Notion reference data (accounts, types, months, ...)
+reference_cache = TTLCache()
+
+
+def cached(key: str, ttl: float):
+    """Decorator caching the result of a no-argument loader in reference_cache"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper():
+            # Hand out a copy so callers can't mutate the cached list
+            return list(reference_cache.get_or_load(key, ttl, func))
+        wrapper.uncached = func
+        return wrapper
+    return decorator
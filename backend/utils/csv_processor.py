@@ -1,16 +1,23 @@
 import csv
 import io
+import json
 import re
-from datetime import datetime
+from datetime import date, datetime
+import functools
 import calendar
-from typing import Dict, List, Any, Tuple, Optional
+import collections
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Any, Tuple, Optional
 import os
 
 # Import functions to get Notion entities
-from .notionAPI import (
-    list_accounts, list_expense_types, list_months, 
-    list_income_types, list_subscriptions, list_debts
-)
+from .mirror import read_reference_data
+from .keyword_matcher import KeywordMatcher
+from .fingerprints import entry_fingerprints, get_fingerprint_index
+from .settings import settings
+from .metrics import CSV_ENTRIES, CSV_PHASE_DURATION, CSV_ROWS_PROCESSED, PhaseTimer
 
 ###################### TYPE OF MOVEMENTS ######################
 
@@ -30,135 +37,364 @@ EXPENSE_KEYWORDS = {
 INCOME_KEYWORDS = {
 }
 
+# Keyword tables compiled into automata, so each concept is scanned once whatever the number of keywords
+_expense_matcher = KeywordMatcher(EXPENSE_KEYWORDS)
+_income_matcher = KeywordMatcher(INCOME_KEYWORDS)
+
+def rebuild_keyword_matchers():
+    """Recompile the keyword matchers. Call it after changing EXPENSE_KEYWORDS or INCOME_KEYWORDS at runtime."""
+    global _expense_matcher, _income_matcher
+    _expense_matcher = KeywordMatcher(EXPENSE_KEYWORDS)
+    _income_matcher = KeywordMatcher(INCOME_KEYWORDS)
+
+@dataclass
+class CategorizationContext:
+    """Lookup indexes built once per upload, so every row is categorized with O(1) dict lookups"""
+    default_account_id: Optional[str] = None
+    month_ids: Dict[str, str] = field(default_factory=dict)         # Month name ("May 25", "May") -> id
+    expense_type_ids: Dict[str, str] = field(default_factory=dict)  # Lowercase expense type name -> id
+    income_type_ids: Dict[str, str] = field(default_factory=dict)   # Lowercase income type name -> id
+
+    @classmethod
+    def from_reference_data(cls, reference_data: Dict[str, List[Dict[str, str]]]) -> "CategorizationContext":
+        accounts = reference_data.get("accounts", [])
+        # Default to the main account if it exists, otherwise the first account
+        default_account = next((acc for acc in accounts if acc["name"] == MAIN_ACCOUNT),
+                               accounts[0] if accounts else None)
+        return cls(
+            default_account_id=default_account["id"] if default_account else None,
+            month_ids=_name_index(reference_data.get("months", [])),
+            expense_type_ids=_name_index(reference_data.get("expense_types", []), lowercase=True),
+            income_type_ids=_name_index(reference_data.get("income_types", []), lowercase=True),
+        )
+
+def _name_index(items: List[Dict[str, str]], lowercase: bool = False) -> Dict[str, str]:
+    """Map name -> id, keeping the first item on duplicate names (like a linear scan would)"""
+    index = {}
+    for item in items:
+        index.setdefault(item["name"].lower() if lowercase else item["name"], item["id"])
+    return index
+
 DEFAULT_EXPENSE_TYPE = None  # Will be set dynamically
 DEFAULT_INCOME_TYPE = None   # Will be set dynamically
 DEFAULT_ACCOUNT = None       # Will be set dynamically
 
-def init_defaults():
+def init_defaults(reference_data: Optional[Dict[str, List[Dict[str, str]]]] = None):
     """Initialize default values from Notion data"""
     global DEFAULT_EXPENSE_TYPE, DEFAULT_INCOME_TYPE, DEFAULT_ACCOUNT
     
+    # Reuse already fetched lists if given, otherwise read the three of them from the local mirror
+    if reference_data is None:
+        reference_data, _ = read_reference_data(["accounts", "expense_types", "income_types"])
+    
     # Get accounts
-    accounts = list_accounts()
+    accounts = reference_data["accounts"]
     # Set default account to Caixa Enginyers if exists, otherwise first account
     DEFAULT_ACCOUNT = next((acc for acc in accounts if acc["name"] == MAIN_ACCOUNT), 
                            accounts[0] if accounts else None)
     
     # Get expense types
-    expense_types = list_expense_types()
+    expense_types = reference_data["expense_types"]
     DEFAULT_EXPENSE_TYPE = expense_types[0] if expense_types else None
     
     # Get income types
-    income_types = list_income_types()
+    income_types = reference_data["income_types"]
     DEFAULT_INCOME_TYPE = income_types[0] if income_types else None
 
-def process_csv(contents: bytes, original_filename: str) -> Dict:
-    """Process CSV file contents and return categorized transactions"""
+EXPECTED_HEADERS = ['DATE', 'CONCEPT', 'IMPORT', 'LOADED']
+
+def check_csv_headers(fieldnames: Optional[List[str]]):
+    """Ensure fieldnames are as expected, otherwise raise ValueError"""
+    missing = [h for h in EXPECTED_HEADERS if h not in (fieldnames or [])]
+    if missing:
+        raise ValueError(f"CSV is missing required headers: {', '.join(missing)}")
+
+def load_categorization_context() -> Tuple[CategorizationContext, Dict[str, str]]:
+    """Fetch the Notion data needed for categorization and build its lookup indexes"""
+    # Get all required data for categorization from the local mirror of the Notion databases
+    reference_data, reference_errors = read_reference_data(
+        ["accounts", "expense_types", "income_types", "months", "subscriptions", "debts"]
+    )
+    
     # Initialize defaults if needed
     if DEFAULT_ACCOUNT is None:
-        init_defaults()
-    print("Processing CSV file...")
-    # Parse CSV
-    csv_text = contents.decode('utf-8-sig') # Use utf-8-sig to handle potential BOM
-    csv_file_like = io.StringIO(csv_text)
-    csv_reader = csv.DictReader(csv_file_like)
-    
-    # Ensure fieldnames are as expected, otherwise raise error or handle
-    expected_headers = ['DATE', 'CONCEPT', 'IMPORT', 'LOADED']
-    if not all(h in csv_reader.fieldnames for h in expected_headers):
-        # Handle missing headers, e.g., raise ValueError or return error structure
-        missing = [h for h in expected_headers if h not in csv_reader.fieldnames]
-        raise ValueError(f"CSV is missing required headers: {', '.join(missing)}")
+        init_defaults(reference_data)
     
-    # Get all required data from Notion for categorization
-    accounts = list_accounts()
-    expense_types = list_expense_types()
-    income_types = list_income_types()
-    months = list_months()
-    subscriptions = list_subscriptions()
-    debts = list_debts()
-
-    # print("Loaded Notion data for categorization")
-    # print(f"Accounts: {accounts}")
-    # print(f"Expense Types: {expense_types}")
-    # print(f"Income Types: {income_types}")
-    # print(f"Months: {months}")
-    # print(f"Subscriptions: {subscriptions}")
-    # print(f"Debts: {debts}")
-    
-    
-    processed_entries = []
-    stats = {
+    return CategorizationContext.from_reference_data(reference_data), reference_errors
+
+def new_stats() -> Dict[str, int]:
+    return {
         "total_rows_in_csv": 0,
         "processed_for_review": 0,
         "already_loaded_in_csv": 0,
+        "already_imported": 0,
         "expenses_found": 0,
         "incomes_found": 0,
         "transfers_found": 0,
         "unknown_type": 0,
     }
-    
-    all_csv_rows = list(csv_reader) # Read all rows to get total count and allow indexing
-    print(f"Total rows in CSV: {len(all_csv_rows)}")
-    stats["total_rows_in_csv"] = len(all_csv_rows)
 
-    for i, row in enumerate(all_csv_rows):
-        # Skip already loaded entries based on 'LOADED' column in the *uploaded* CSV
-        # print("processing row", row)
-        
-        loaded_val = str(row.get('LOADED', '')).strip().lower()
-        # print(f"Row {i} loaded value: {loaded_val}")
+def count_processed(engine: str, stats: Dict[str, int], entry_types: Dict[str, int]):
+    """Add a processed upload to the rows/entries metrics (GET /metrics)"""
+    CSV_ROWS_PROCESSED.inc(stats["total_rows_in_csv"], engine=engine)
+    for entry_type, count in entry_types.items():
+        CSV_ENTRIES.inc(count, type=str(entry_type))
+
+def reference_warnings(reference_errors: Dict[str, str]) -> List[str]:
+    return [f"Could not load {name} from Notion ({error})" for name, error in reference_errors.items()]
+
+def is_loaded(row: Dict[str, str]) -> bool:
+    """Whether the 'LOADED' column of the *uploaded* CSV marks the row as already in Notion"""
+    loaded_val = str(row.get('LOADED', '')).strip().lower()
+    return loaded_val == 'true' or loaded_val == '1'
+
+# Outcomes of ImportedTransactions.match
+IMPORTED = "imported"
+POSSIBLE_DUPLICATE = "possible_duplicate"
+
+class ImportedTransactions:
+    """
+    Matches the entries of one upload, in file order, against the transactions already in
+    Notion (see utils/fingerprints.py). Every saved page absorbs a single matching row, so of
+    two identical movements (e.g. two metro tickets on the same day) only as many as were
+    saved are skipped.
+    """
+
+    def __init__(self, index=None):
+        self.index = get_fingerprint_index() if index is None else index
+        self._claimed = set()  # Page ids already matched to a row of this upload
+
+    def match(self, entry: Dict[str, Any]) -> Optional[str]:
+        """IMPORTED (skip it), POSSIBLE_DUPLICATE (same fingerprint, every such page already matched) or None"""
+        page_ids = [page_id for fingerprint in entry_fingerprints(entry) for page_id in self.index.page_ids(fingerprint)]
+        for page_id in page_ids:
+            if page_id not in self._claimed:
+                self._claimed.add(page_id)
+                return IMPORTED
+        return POSSIBLE_DUPLICATE if page_ids else None
+
+def count_entry(stats: Dict[str, int], entry: Dict[str, Any]):
+    stats["processed_for_review"] += 1
+    entry_type = entry.get("type", "unknown_type")
+    if entry_type in stats: # e.g. expenses_found
+         stats[f"{entry_type}s_found"] = stats.get(f"{entry_type}s_found", 0) + 1
+    else:
+        stats["unknown_type"] +=1
+
+def review_entries(
+    entries: Iterable[Dict[str, Any]],
+    stats: Dict[str, int],
+    imported: Optional[ImportedTransactions] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Entries to review, in the order given (file order): drops the ones already saved to Notion
+    (e.g. overlapping exports) and flags identical movements beyond those as possible_duplicate.
+    """
+    imported = ImportedTransactions() if imported is None else imported
+    for entry in entries:
+        match = imported.match(entry)
+        if match == IMPORTED:
+            stats["already_imported"] += 1
+            continue
+        if match == POSSIBLE_DUPLICATE:
+            entry["possible_duplicate"] = True
+        count_entry(stats, entry)
+        yield entry
+
+def iter_categorized_rows(
+    csv_reader: Iterable[Dict[str, str]],
+    context: CategorizationContext,
+    original_filename: str,
+    stats: Dict[str, int],
+    start: int = 0
+) -> Iterator[Dict[str, Any]]:
+    """
+    Categorize rows one by one as they are read, updating the row stats in place (entry
+    stats are counted by review_entries). start is the index of the first row.
+    """
+    for i, row in enumerate(csv_reader, start):
+        stats["total_rows_in_csv"] += 1
         
-        if loaded_val == 'true' or loaded_val == '1':
+        # Skip already loaded entries based on 'LOADED' column in the *uploaded* CSV
+        if is_loaded(row):
             stats["already_loaded_in_csv"] += 1
             continue
         
-        # print("Row not loaded, processing...")
-        
-        entry = categorize_transaction(
-            row, 
-            i, 
-            accounts,           # Correct position
-            expense_types, 
-            income_types, 
-            months, 
-            subscriptions, 
-            debts,
-            original_filename   # Correct position - last parameter
-        )
-        # print(f"Categorized entry: {entry}")
+        entry = categorize_transaction(row, i, context, original_filename)
         
         if entry:
-            processed_entries.append(entry)
-            entry_type = entry.get("type", "unknown_type")
-            if entry_type in stats: # e.g. expenses_found
-                 stats[f"{entry_type}s_found"] = stats.get(f"{entry_type}s_found", 0) + 1
-            else:
-                stats["unknown_type"] +=1
+            yield entry
+
+CSV_ENGINES = ("rows", "columnar")
+
+###################### MULTI-PROCESS ######################
+# Categorization is CPU-bound, so very large uploads can be sharded across processes.
+# Each worker receives the CategorizationContext and keyword tables once, at start-up.
+
+PARALLEL_MIN_ROWS = 50000  # Below this, starting the worker processes costs more than it saves
+PARALLEL_SHARD_SIZE = 20000
+PARALLEL_MAX_WORKERS = os.cpu_count() or 1  # More processes than cores only add start-up cost
+
+_worker_context: Optional[CategorizationContext] = None
 
-    # print(f"Processed {len(processed_entries)} entries for review")
+def _init_worker(
+    context: CategorizationContext,
+    expense_keywords: Dict[str, str],
+    income_keywords: Dict[str, str],
+    settings_overrides: Dict[str, Any]
+):
+    global _worker_context
+    _worker_context = context
+    # Spawned workers start from the environment, apply the parent's configure() overrides too
+    settings.configure(**settings_overrides)
+    # Workers may be fresh interpreters, bring runtime keyword changes along
+    EXPENSE_KEYWORDS.clear(); EXPENSE_KEYWORDS.update(expense_keywords)
+    INCOME_KEYWORDS.clear(); INCOME_KEYWORDS.update(income_keywords)
+    rebuild_keyword_matchers()
+
+def _categorize_shard(shard: Tuple[int, List[Dict[str, str]], str, str]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Categorize one shard in a worker process, returns its entries and partial stats"""
+    start, rows, original_filename, engine = shard
+    stats = new_stats()
+    if engine == "columnar":
+        entries = categorize_columns(rows, _worker_context, original_filename, stats, start)
+    else:
+        entries = list(iter_categorized_rows(rows, _worker_context, original_filename, stats, start))
+    return entries, stats
+
+def categorize_in_processes(
+    rows: List[Dict[str, str]],
+    context: CategorizationContext,
+    original_filename: str,
+    stats: Dict[str, int],
+    engine: str = "rows",
+    workers: int = 2
+) -> List[Dict[str, Any]]:
+    """Categorize rows in a pool of worker processes, merging entries in row order and summing stats"""
+    shards = [
+        (start, rows[start:start + PARALLEL_SHARD_SIZE], original_filename, engine)
+        for start in range(0, len(rows), PARALLEL_SHARD_SIZE)
+    ]
+    # spawn: forking the threaded server process is not safe
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(context, dict(EXPENSE_KEYWORDS), dict(INCOME_KEYWORDS), settings.overrides())
+    ) as pool:
+        entries = []
+        for shard_entries, shard_stats in pool.map(_categorize_shard, shards):
+            entries.extend(shard_entries)
+            for key, value in shard_stats.items():
+                stats[key] += value
+    return entries
+
+def process_csv(
+    contents: bytes,
+    original_filename: str,
+    engine: str = "rows",
+    workers: int = 1,
+    context: Optional[CategorizationContext] = None
+) -> Dict:
+    """
+    Process CSV file contents and return categorized transactions.
+    engine="columnar" uses the batch engine (same output, faster on large files).
+    workers > 1 shards files of PARALLEL_MIN_ROWS rows or more across that many processes,
+    at most PARALLEL_MAX_WORKERS.
+    Pass a context to reuse Notion data already loaded (e.g. for several files).
+    The time spent in each phase (decode, fetch_reference, categorize, sort) is returned
+    under "timings", in milliseconds.
+    """
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"Unknown CSV engine: {engine}")
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    workers = min(workers, PARALLEL_MAX_WORKERS)
+    timer = PhaseTimer()
+    print("Processing CSV file...")
+    with timer.phase("decode"):
+        # Parse CSV
+        csv_text = contents.decode('utf-8-sig') # Use utf-8-sig to handle potential BOM
+        csv_file_like = io.StringIO(csv_text)
+        csv_reader = csv.DictReader(csv_file_like)
+        check_csv_headers(csv_reader.fieldnames)
+    
+    reference_errors = {}
+    if context is None:
+        with timer.phase("fetch_reference"):
+            context, reference_errors = load_categorization_context()
     
-    stats["processed_for_review"] = len(processed_entries)
-    processed_entries.sort(key=lambda x: datetime.strptime(x["date"], "%Y-%m-%d"))
+    stats = new_stats()
+    with timer.phase("decode"):
+        rows = list(csv_reader) if engine == "columnar" or workers > 1 else None
+    # The rows engine reads the CSV lazily, its parsing is part of "categorize"
+    with timer.phase("categorize"):
+        if rows is not None and workers > 1 and len(rows) >= PARALLEL_MIN_ROWS:
+            processed_entries = categorize_in_processes(rows, context, original_filename, stats, engine, workers)
+        elif engine == "columnar":
+            processed_entries = categorize_columns(rows, context, original_filename, stats)
+        else:
+            processed_entries = list(iter_categorized_rows(rows if rows is not None else csv_reader, context, original_filename, stats))
+        # In file order, so the first of several identical rows are the ones matched to saved pages
+        processed_entries = list(review_entries(processed_entries, stats))
+    print(f"Total rows in CSV: {stats['total_rows_in_csv']}")
+    count_processed(engine, stats, collections.Counter(entry.get("type") for entry in processed_entries))
     
-    # print(f"Final stats: {processed_entries}")
+    with timer.phase("sort"):
+        processed_entries.sort(key=lambda x: parse_date(x["date"]))
+    for phase, milliseconds in timer.timings.items():
+        CSV_PHASE_DURATION.observe(milliseconds / 1000, phase=phase)
     
     return {
         "status": "success",
         "message": f"Successfully processed {len(processed_entries)} entries.",
         "entries": processed_entries,
-        "stats": stats
+        "stats": stats,
+        "warnings": reference_warnings(reference_errors),
+        "timings": dict(timer.timings)
     }
 
+def stream_csv(file_obj: BinaryIO, original_filename: str) -> Iterator[str]:
+    """
+    Streaming variant of process_csv for large files, reading a binary file object.
+    Headers are checked and Notion data loaded right away (so errors surface before
+    streaming starts), then the returned iterator yields one NDJSON line per entry,
+    in file order, and a last {"stats": ...} trailer line. Memory use stays constant.
+    """
+    # TextIOWrapper decodes incrementally, reading the file in buffered chunks
+    text_stream = io.TextIOWrapper(file_obj, encoding='utf-8-sig', newline='')
+    csv_reader = csv.DictReader(text_stream)
+    try:
+        check_csv_headers(csv_reader.fieldnames)
+        context, reference_errors = load_categorization_context()
+    except Exception:
+        text_stream.close()
+        raise
+    
+    def lines() -> Iterator[str]:
+        stats = new_stats()
+        entry_types = collections.Counter()
+        try:
+            for entry in review_entries(iter_categorized_rows(csv_reader, context, original_filename, stats), stats):
+                entry_types[entry.get("type")] += 1
+                yield json.dumps(entry) + "\n"
+        finally:
+            text_stream.close()
+            count_processed("stream", stats, entry_types)
+        
+        yield json.dumps({
+            "status": "success",
+            "message": f"Successfully processed {stats['processed_for_review']} entries.",
+            "stats": stats,
+            "warnings": reference_warnings(reference_errors)
+        }) + "\n"
+    
+    return lines()
+
 def categorize_transaction(
     row: Dict[str, str], 
     row_id: int,
-    accounts: List[Dict[str, str]],
-    expense_types: List[Dict[str, str]],
-    income_types: List[Dict[str, str]],
-    months: List[Dict[str, str]],
-    subscriptions: List[Dict[str, str]],
-    debts: List[Dict[str, str]],
+    context: CategorizationContext,
     original_csv_filename: str
 ) -> Optional[Dict[str, Any]]:
     """Categorize a transaction row based on its content"""
@@ -176,13 +412,10 @@ def categorize_transaction(
         return None
     
     # Get month id from date
-    month_id = get_month_from_date(date, months)
-    
-    # Find default account (Caixa Enginyers)
-    default_account = next((acc for acc in accounts if acc["name"] == MAIN_ACCOUNT), 
-                          accounts[0] if accounts else None)
+    month_id = get_month_from_date(date, context.month_ids)
     
-    default_account_id = default_account["id"] if default_account else None
+    # Default account (main account), resolved once per upload
+    default_account_id = context.default_account_id
     
     # print("DATE", date)
     # Base transaction entry
@@ -201,7 +434,7 @@ def categorize_transaction(
     # 1. Check for expense patterns
     if (concept.startswith(CARD) and amount < 0) or (concept.startswith(BIZUM_TO) and amount < 0):
         # It's an expense
-        expense_type_id = find_expense_type(concept, expense_types)
+        expense_type_id = find_expense_type(concept, context.expense_type_ids)
         
         # Extract name from TARGETA concept
         name = ""
@@ -234,7 +467,7 @@ def categorize_transaction(
     # 2. Check for income patterns  
     elif (concept.startswith(TRANSFER) or concept.startswith(SALARY)) and amount > 0:
         # It's an income
-        income_type_id = find_income_type(concept, income_types)
+        income_type_id = find_income_type(concept, context.income_type_ids)
         
         return {
             **transaction,
@@ -286,58 +519,203 @@ def categorize_transaction(
             "income_type_id": None
         }
 
-def find_expense_type(concept: str, expense_types: List[Dict[str, str]]) -> Optional[str]:
+###################### COLUMNAR ENGINE ######################
+# Batch alternative to calling categorize_transaction per row: the DATE/CONCEPT/IMPORT
+# columns are processed as whole columns, and every derived value (amount, month id,
+# names, types) is computed once per distinct input, since extracts repeat dates,
+# merchants and amounts heavily. Output is identical to the row-by-row path.
+
+_CARD_NAME = re.compile(r'TARGETA \*\d+ (.*)')
+_BIZUM_TO_NAME = re.compile(r'BIZUM A: (.*)')
+_BIZUM_FROM_NAME = re.compile(r'BIZUM DE: (.*)')
+
+def _distinct_map(func, column: List[Any]) -> List[Any]:
+    """Apply func once per distinct value of column and broadcast the results"""
+    results = {value: func(value) for value in set(column)}
+    return [results[value] for value in column]
+
+def _extracted_name(pattern: re.Pattern, concept: str) -> str:
+    match = pattern.search(concept)
+    return match.group(1) if match else ""
+
+def _parse_amount(amount_str: str) -> Optional[float]:
+    try:
+        return fix_number_format(amount_str)
+    except ValueError as e:
+        print(f"Error parsing amount '{amount_str}': {e}")
+        return None
+
+def categorize_columns(
+    rows: List[Dict[str, str]],
+    context: CategorizationContext,
+    original_csv_filename: str,
+    stats: Dict[str, int],
+    start: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Categorize all rows at once, column by column, updating the row stats in place (entry
+    stats are counted by review_entries). start is the index of the first row.
+    Mirrors the rules of categorize_transaction, benchmarks/check_engines.py checks they agree.
+    """
+    stats["total_rows_in_csv"] += len(rows)
+    
+    # Row selection: drop rows already loaded, or missing one of the required columns
+    loaded = list(map(is_loaded, rows))
+    stats["already_loaded_in_csv"] += sum(loaded)
+    positions = [
+        i for i, (row, row_loaded) in enumerate(zip(rows, loaded))
+        if not row_loaded and 'DATE' in row and 'CONCEPT' in row and 'IMPORT' in row
+    ]
+    
+    # Amount parsing, rows whose amount can't be parsed are dropped
+    amounts = _distinct_map(_parse_amount, [rows[i]['IMPORT'] for i in positions])
+    positions, amounts = zip(*[(i, a) for i, a in zip(positions, amounts) if a is not None]) if positions else ((), ())
+    row_ids = [start + i for i in positions]
+    dates = [rows[i]['DATE'] for i in positions]
+    concepts = [rows[i]['CONCEPT'] for i in positions]
+    
+    # Sign tests and prefix masks
+    negative = [amount < 0 for amount in amounts]
+    positive = [amount > 0 for amount in amounts]
+    prefixes = _distinct_map(lambda c: (
+        c.startswith(CARD),
+        c.startswith(BIZUM_TO),
+        c.startswith(TRANSFER) or c.startswith(SALARY),
+        c.startswith(BIZUM_FROM) or c.startswith(INCOME)
+    ), concepts)
+    
+    # Transaction type column, same precedence as categorize_transaction
+    types = [
+        "pattern_expense" if (card or bizum_to) and neg else
+        "pattern_income" if income_prefix and pos else
+        "pattern_transfer" if transfer_prefix and pos else
+        "expense" if neg else "income"
+        for (card, bizum_to, income_prefix, transfer_prefix), neg, pos in zip(prefixes, negative, positive)
+    ]
+    
+    # Month ids, once per distinct date
+    month_ids = _distinct_map(lambda d: get_month_from_date(d, context.month_ids), dates)
+    amount_strs = [str(abs(amount)) for amount in amounts]
+    
+    # Names and categories are only needed by some types: memoized per concept, computed on demand
+    @functools.lru_cache(maxsize=None)
+    def expense_details(concept: str) -> Tuple[str, Optional[str]]:
+        pattern = _CARD_NAME if concept.startswith(CARD) else _BIZUM_TO_NAME
+        return _extracted_name(pattern, concept) or concept, find_expense_type(concept, context.expense_type_ids)
+    
+    @functools.lru_cache(maxsize=None)
+    def income_type_id(concept: str) -> Optional[str]:
+        return find_income_type(concept, context.income_type_ids)
+    
+    @functools.lru_cache(maxsize=None)
+    def transfer_name(concept: str) -> str:
+        return _extracted_name(_BIZUM_FROM_NAME, concept) or concept
+    
+    # Materialize the entries
+    default_account_id = context.default_account_id
+    entries = []
+    for k, row_id in enumerate(row_ids):
+        concept = concepts[k]
+        entry = {
+            "csv_row_index": row_id,
+            "original_csv_filename": original_csv_filename,
+            "date": dates[k],
+            "concept": concept,
+            "amount": amount_strs[k],
+            "account_id": default_account_id,
+            "month_id": month_ids[k]
+        }
+        entry_type = types[k]
+        if entry_type == "pattern_expense":
+            name, expense_type_id = expense_details(concept)
+            entry.update({
+                "type": "expense", "name": name, "expense_type_id": expense_type_id,
+                "subscription_id": None, "debt_id": None, "split": False, "subs": False
+            })
+        elif entry_type == "pattern_income":
+            entry.update({"type": "income", "name": concept, "income_type_id": income_type_id(concept)})
+        elif entry_type == "pattern_transfer":
+            entry.update({
+                "type": "transfer", "name": transfer_name(concept),
+                "from_account_id": None, "from_saving_id": None, "to_account_id": default_account_id,
+                "to_saving_id": None, "transfer_type": "Return"
+            })
+        elif entry_type == "expense":
+            entry.update({
+                "type": "expense", "name": concept, "expense_type_id": None,
+                "subscription_id": None, "debt_id": None, "split": False, "subs": False
+            })
+        else:
+            entry.update({"type": "income", "name": concept, "income_type_id": None})
+        entries.append(entry)
+    
+    return entries
+
+def find_expense_type(concept: str, expense_type_ids: Dict[str, str]) -> Optional[str]:
     """Find appropriate expense type based on concept text"""
     concept_lower = concept.lower()
     
-    # Check against keywords
-    for keyword, category in EXPENSE_KEYWORDS.items():
-        if keyword in concept_lower:
-            # Find expense type ID matching this category
-            matching_type = next((et for et in expense_types if et["name"].lower() == category.lower()), None)
-            if matching_type:
-                return matching_type["id"]
+    # Keywords found in the concept, in EXPENSE_KEYWORDS order (first listed wins)
+    for category in _expense_matcher.iter_categories(concept_lower):
+        # Find expense type ID matching this category
+        matching_type_id = expense_type_ids.get(category.lower())
+        if matching_type_id:
+            return matching_type_id
     
     # Default to None if no match
     return None
 
-def find_income_type(concept: str, income_types: List[Dict[str, str]]) -> Optional[str]:
+def find_income_type(concept: str, income_type_ids: Dict[str, str]) -> Optional[str]:
     """Find appropriate income type based on concept text"""
     concept_lower = concept.lower()
     
-    # Check against keywords
-    for keyword, category in INCOME_KEYWORDS.items():
-        if keyword in concept_lower:
-            # Find income type ID matching this category
-            matching_type = next((it for it in income_types if it["name"].lower() == category.lower()), None)
-            if matching_type:
-                return matching_type["id"]
+    # Keywords found in the concept, in INCOME_KEYWORDS order (first listed wins)
+    for category in _income_matcher.iter_categories(concept_lower):
+        # Find income type ID matching this category
+        matching_type_id = income_type_ids.get(category.lower())
+        if matching_type_id:
+            return matching_type_id
     
     # Default to None if no match
     return None
 
-def get_month_from_date(date_str: str, months: List[Dict[str, str]]) -> Optional[str]:
+@functools.lru_cache(maxsize=8192)
+def parse_date(date_str: str) -> date:
+    """
+    Parse a YYYY-MM-DD date. Memoized on the raw string since extracts repeat dates
+    heavily, so the month lookup and the final sort share a single parse per date.
+    """
+    if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
+        try:
+            return date.fromisoformat(date_str)  # Fast path
+        except ValueError:
+            pass
+    # Anything else goes through strptime, which also produces the usual error message
+    return datetime.strptime(date_str, "%Y-%m-%d").date()
+
+@functools.lru_cache(maxsize=8192)
+def get_month_names(date_str: str) -> Tuple[str, str]:
+    """Month names a date can be filed under, e.g. ("May 25", "May")"""
+    dt = parse_date(date_str)
+    month_name = dt.strftime("%B")[:3]  # Full month name
+    year = dt.strftime("%Y")[2:]
+    
+    # Format to match your month names pattern (e.g., "May 25")
+    return f"{month_name} {year}", month_name
+
+def get_month_from_date(date_str: str, month_ids: Dict[str, str]) -> Optional[str]:
     """Extract month from date string and find its ID"""
     try:
-        # Assuming date_str is in format dd/mm/yyyy
-        dt = datetime.strptime(date_str, "%Y-%m-%d")
-        month_name = dt.strftime("%B")[:3]  # Full month name
-        year = dt.strftime("%Y")[2:]
-        
-        # Format to match your month names pattern (e.g., "May 2025")
-        formatted_month = f"{month_name} {year}"
-        
-        # Find matching month ID
-        matching_month = next((m for m in months if m["name"] == formatted_month), None)
-        if matching_month:
-            return matching_month["id"]
-        
-        # Try just the month name
-        matching_month = next((m for m in months if m["name"] == month_name), None)
-        return matching_month["id"] if matching_month else None
-        
+        formatted_month, month_name = get_month_names(date_str)
     except Exception:
         return None
+    
+    # Find matching month ID
+    if formatted_month in month_ids:
+        return month_ids[formatted_month]
+    
+    # Try just the month name
+    return month_ids.get(month_name)
 
 def fix_number_format(value_str: str) -> float:
     """
@@ -0,0 +1,241 @@
+import hashlib
+import math
+import sqlite3
+import threading
+import requests
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .notionAPI import NotionAPIError, TRANSACTION_DATABASES, database_id, find_transactions, iter_transactions
+from .settings import settings
+
+HARVEST_BATCH_SIZE = 500  # Fingerprints written (and high-water mark saved) per batch
+
+# TRANSACTION_DATABASES name of each entry type
+ENTRY_DATABASES = {"expense": "expenses", "income": "incomes", "transfer": "transfers"}
+
+
+def transaction_fingerprint(date: str, concept: Optional[str], amount, account_id: Optional[str]) -> str:
+    """
+    Stable identity of a bank movement: date, normalized concept, absolute amount and account.
+    Amounts are compared as absolute values since entries store them unsigned.
+    """
+    normalized_concept = " ".join((concept or "").lower().split())
+    normalized_amount = f"{abs(float(amount)):.2f}"
+    key = f"{date}|{normalized_concept}|{normalized_amount}|{account_id or ''}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def entry_fingerprints(entry: Dict[str, Any]) -> List[str]:
+    """Fingerprints an entry (TransactionEntry fields) can be stored under, by the save path or the harvest"""
+    concepts = [entry["concept"]]
+    if entry["type"] == "transfer":
+        # Transfers harvested from Notion only have their title (the entry name) as concept
+        concepts.append(entry["name"])
+    return [transaction_fingerprint(entry["date"], concept, entry["amount"], entry["account_id"]) for concept in concepts]
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over hex digests (no false negatives, rare false positives)"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray(self.size // 8 + 1)
+
+    def _positions(self, digest: str):
+        # Double hashing: two independent 64 bit values taken from the digest
+        h1 = int(digest[:16], 16)
+        h2 = int(digest[16:32], 16) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, digest: str):
+        for position in self._positions(digest):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class FingerprintIndex:
+    """
+    Persistent index of the transactions already in Notion, one row per Notion page, stored
+    in SQLite with an in-memory Bloom filter of their fingerprints in front: most rows of an
+    upload are new, and those are answered by the filter alone without touching the database.
+    Identical movements (e.g. two metro tickets on the same day) share a fingerprint but not
+    a page, so the index knows how many of them were saved.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.state_path  # Same local state file as the save queue
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # High-water marks of the Notion harvest, one per transactions database
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(imported_transactions)")]
+        if columns and "page_id" not in columns:
+            # Index from before page ids were kept (one row per fingerprint): drop it and
+            # forget the harvest marks, the next harvest rebuilds it from Notion
+            print("Rebuilding the duplicate index from Notion")
+            self._conn.execute("DROP TABLE imported_transactions")
+            self._conn.execute("DELETE FROM sync_state")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS imported_transactions (
+                fingerprint TEXT NOT NULL,
+                page_id TEXT NOT NULL,
+                date TEXT NOT NULL,
+                concept TEXT,
+                amount TEXT NOT NULL,
+                account_id TEXT,
+                source TEXT NOT NULL,
+                imported_at TEXT NOT NULL,
+                PRIMARY KEY (fingerprint, page_id)
+            )
+        """)
+        self._conn.commit()
+        self._rebuild_filter()
+
+    def _rebuild_filter(self):
+        """(Re)load every stored fingerprint into a filter sized for twice the current count"""
+        count = self._conn.execute("SELECT COUNT(*) FROM imported_transactions").fetchone()[0]
+        self._count = count
+        self._filter = BloomFilter(capacity=max(10000, count * 2))
+        for (fingerprint,) in self._conn.execute("SELECT fingerprint FROM imported_transactions"):
+            self._filter.add(fingerprint)
+
+    def add_many(self, transactions: Iterable[Tuple[str, str, Optional[str], str, Optional[str]]], source: str = "save") -> int:
+        """Record (page_id, date, concept, amount, account_id) tuples, returns how many were new"""
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [
+            (transaction_fingerprint(date, concept, amount, account_id), page_id, date, concept, str(amount), account_id, source, now)
+            for page_id, date, concept, amount, account_id in transactions
+        ]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO imported_transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+            added = self._conn.total_changes - before
+            self._count += added
+            if self._count > self._filter.capacity:
+                self._rebuild_filter()
+            else:
+                for row in rows:
+                    self._filter.add(row[0])
+        return added
+
+    def add(self, page_id: str, date: str, concept: Optional[str], amount, account_id: Optional[str], source: str = "save") -> bool:
+        return self.add_many([(page_id, date, concept, amount, account_id)], source) == 1
+
+    def page_ids(self, fingerprint: str) -> List[str]:
+        """Notion pages saved with this fingerprint, usually none or one"""
+        if fingerprint not in self._filter:
+            return []
+        # Possible hit, confirm against the table to rule out a false positive
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page_id FROM imported_transactions WHERE fingerprint = ?", (fingerprint,)
+            ).fetchall()
+        return [page_id for (page_id,) in rows]
+
+    def contains(self, date: str, concept: Optional[str], amount, account_id: Optional[str]) -> bool:
+        return bool(self.page_ids(transaction_fingerprint(date, concept, amount, account_id)))
+
+    def get_mark(self, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_mark(self, name: str, value: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (name, value))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._count
+
+
+_index: Optional[FingerprintIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_fingerprint_index() -> FingerprintIndex:
+    """Shared index of the process, opened on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = FingerprintIndex()
+        return _index
+
+
+_sync_lock = threading.Lock()
+
+
+def sync_from_notion(index: Optional[FingerprintIndex] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Upsert the fingerprints of the transactions already in Notion (Expenses, Incomes, Transfers).
+    The first run scans every page, later runs only ask for pages edited since the saved
+    high-water mark. Returns a report per database, a failing database doesn't stop the others.
+    """
+    if index is None:
+        index = get_fingerprint_index()
+    report = {}
+    with _sync_lock:
+        for name, (database_name, _, _) in TRANSACTION_DATABASES.items():
+            if not database_id(database_name):
+                continue
+            mark = index.get_mark(name)
+            result = report[name] = {"full_scan": mark is None, "fetched": 0, "added": 0}
+            batch, high_water = [], mark
+            try:
+                # Pages come oldest edit first, so the mark can be saved after every batch
+                # and an interrupted first scan resumes where it stopped
+                for edited_at, transaction in iter_transactions(name, mark):
+                    batch.append(transaction)
+                    high_water = edited_at
+                    if len(batch) >= HARVEST_BATCH_SIZE:
+                        result["added"] += index.add_many(batch, source=f"notion:{name}")
+                        result["fetched"] += len(batch)
+                        index.set_mark(name, high_water)
+                        batch = []
+                result["added"] += index.add_many(batch, source=f"notion:{name}")
+                result["fetched"] += len(batch)
+                if high_water:
+                    index.set_mark(name, high_water)
+            except (NotionAPIError, requests.RequestException) as e:
+                print(f"Error harvesting {name} fingerprints:", e)
+                result["error"] = str(e)
+    return report
+
+
+def find_saved_page(entry: Dict[str, Any], index: Optional[FingerprintIndex] = None) -> Optional[str]:
+    """
+    Id of a Notion page already holding entry (TransactionEntry fields), for saves that may have
+    been interrupted after Notion created their page. Looks in the index, then asks Notion for
+    the pages of that date (adding a match to the index). None if neither has it.
+    Raises NotionAPIError/requests errors when Notion can't be asked.
+    """
+    if index is None:
+        index = get_fingerprint_index()
+    fingerprints = entry_fingerprints(entry)
+    for fingerprint in fingerprints:
+        page_ids = index.page_ids(fingerprint)
+        if page_ids:
+            return page_ids[0]
+
+    name = ENTRY_DATABASES.get(entry["type"])
+    if name is None:
+        return None
+    for transaction in find_transactions(name, entry["date"]):
+        if transaction_fingerprint(*transaction[1:]) in fingerprints:
+            index.add(*transaction, source=f"notion:{name}")
+            return transaction[0]
+    return None
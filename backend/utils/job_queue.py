@@ -0,0 +1,175 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .settings import settings
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_INTERRUPTED = "interrupted"  # A resumed job whose outcome can't be told, left for the user to reconcile
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobQueue:
+    """
+    Durable FIFO of jobs stored in SQLite. Jobs go pending -> running -> done/failed/interrupted;
+    jobs left running by a crash are put back to pending with requeue_running(), and their
+    next claim reports attempts > 1 so the handler can check what the first run did.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.state_path  # Local SQLite file holding the backend's durable state
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                result TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def enqueue_many(self, payloads: List[Dict[str, Any]]) -> List[str]:
+        """Insert several pending jobs in one transaction and return their ids"""
+        now = _now()
+        job_ids = [uuid.uuid4().hex for _ in payloads]
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO jobs (id, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, JOB_PENDING, json.dumps(payload), now, now) for job_id, payload in zip(job_ids, payloads)]
+            )
+        return job_ids
+
+    def enqueue(self, payload: Dict[str, Any]) -> str:
+        return self.enqueue_many([payload])[0]
+
+    def claim(self) -> Optional[Tuple[str, Dict[str, Any], int]]:
+        """Mark the oldest pending job as running and return (id, payload, attempts), or None if the queue is empty"""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT id, payload, attempts FROM jobs WHERE status = ? ORDER BY created_at, rowid LIMIT 1",
+                (JOB_PENDING,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (JOB_RUNNING, _now(), row["id"])
+            )
+        return row["id"], json.loads(row["payload"]), row["attempts"] + 1
+
+    def complete(self, job_id: str, status: str, result: Dict[str, Any]):
+        """Store the final status (done/failed/interrupted) and result of a job"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result), _now(), job_id)
+            )
+
+    def requeue_running(self) -> int:
+        """
+        Put jobs interrupted by a shutdown/crash back in the queue, returns how many.
+        Their first run may have gone through, the handler sees it from their attempts.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?",
+                (JOB_PENDING, _now(), JOB_RUNNING)
+            )
+        return cursor.rowcount
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Shared queue of the process, opened on first use"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
+
+
+WORKER_ERROR_BACKOFF = 1.0      # Seconds before retrying after a queue (SQLite) error, doubled up to the max
+WORKER_ERROR_BACKOFF_MAX = 30.0
+
+async def run_worker(
+    queue: JobQueue,
+    handler: Callable[[Dict[str, Any], int], Awaitable[Tuple[str, Dict[str, Any]]]],
+    concurrency: int = 1,
+    poll_interval: float = 0.5
+):
+    """
+    Drain the queue forever with `concurrency` parallel consumers.
+    handler(payload, attempts) returns (status, result) with status JOB_DONE, JOB_FAILED or
+    JOB_INTERRUPTED; attempts > 1 means an earlier run of the job was interrupted.
+    Cancelling the worker leaves in-flight jobs running, they are requeued on the next start.
+    Queue errors (e.g. "database is locked") are logged and retried with backoff, they
+    never stop a consumer.
+    """
+    async def retry_queue_call(description: str, func: Callable[..., Any], *args: Any) -> Any:
+        # SQLite calls block, run them off the event loop
+        backoff = WORKER_ERROR_BACKOFF
+        while True:
+            try:
+                return await asyncio.to_thread(func, *args)
+            except Exception as e:  # Mostly sqlite3 errors, anything else must not stop the consumer either
+                print(f"Error {description}: {type(e).__name__} - {str(e)}, retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, WORKER_ERROR_BACKOFF_MAX)
+
+    async def consume():
+        while True:
+            job = await retry_queue_call("claiming a job", queue.claim)
+            if job is None:
+                await asyncio.sleep(poll_interval)
+                continue
+
+            job_id, payload, attempts = job
+            try:
+                status, result = await handler(payload, attempts)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error running job {job_id}: {type(e).__name__} - {str(e)}")
+                status, result = JOB_FAILED, {"status": "error", "message": str(e)}
+            # Keep retrying: a job left running would be saved again after a restart
+            await retry_queue_call(f"completing job {job_id}", queue.complete, job_id, status, result)
+
+    await asyncio.gather(*(consume() for _ in range(concurrency)))
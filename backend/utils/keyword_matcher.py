@@ -0,0 +1,68 @@
+from collections import deque
+from typing import Dict, Iterator, List
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton compiled from an ordered keyword -> category mapping.
+    A single pass over a text finds every keyword it contains (overlapping ones included),
+    instead of one substring test per keyword. Matches are reported in rule order,
+    i.e. the order of the keywords in the mapping, which is their priority.
+    """
+
+    def __init__(self, keywords: Dict[str, str]):
+        self.keywords = list(keywords)
+        self.categories = list(keywords.values())
+
+        # State 0 is the root. goto[state][char] -> state, outputs[state] -> rule indices ending there
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[int]] = [[]]
+        self._always: List[int] = []  # Empty keywords match any text
+
+        for index, keyword in enumerate(self.keywords):
+            if not keyword:
+                self._always.append(index)
+                continue
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                state = next_state
+            self._outputs[state].append(index)
+
+        # Breadth-first pass to set failure links and merge the outputs of the suffix states.
+        # Depth 1 states keep their failure link to the root.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def match_indices(self, text: str) -> List[int]:
+        """Indices of all the keywords found in text, sorted by rule order"""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set(self._always)
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return sorted(found)
+
+    def iter_categories(self, text: str) -> Iterator[str]:
+        """Categories of the keywords found in text, highest priority first"""
+        for index in self.match_indices(text):
+            yield self.categories[index]
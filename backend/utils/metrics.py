@@ -0,0 +1,235 @@
+import bisect
+import cProfile
+import io
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Prometheus text exposition format (version 0.0.4), served by GET /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from a fast local call to a Notion call stuck behind several retries
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    """Base of Counter/Histogram: a name, help text and a fixed set of label names"""
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, one per combination of label values"""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class Histogram(_Metric):
+    """Observations counted in cumulative buckets, with their sum and count"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelValues, List[float]] = {}  # key -> per-bucket counts (+Inf last), then sum
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.setdefault(key, [0] * (len(self.buckets) + 2))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the block, also when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, list(counts)) for key, counts in self._values.items())
+        lines = []
+        for key, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrics of the process, in registration order"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Optional[Sequence[float]] = None) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets or DEFAULT_BUCKETS))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = Registry()
+
+######################## NOTION ########################
+
+NOTION_REQUEST_DURATION = registry.histogram(
+    "notion_request_duration_seconds", "Duration of each Notion API attempt",
+    ["database", "operation"]
+)
+NOTION_REQUESTS = registry.counter(
+    "notion_requests_total", "Notion API attempts by response status (or the exception name)",
+    ["database", "operation", "status"]
+)
+NOTION_RATE_LIMITED = registry.counter(
+    "notion_rate_limited_total", "Notion API attempts answered 429",
+    ["database", "operation"]
+)
+NOTION_RETRIES = registry.counter(
+    "notion_retries_total", "Notion API attempts repeated after a 429, 5xx or connection error",
+    ["database", "operation"]
+)
+NOTION_ERRORS = registry.counter(
+    "notion_errors_total", "Notion API calls that failed after their last attempt",
+    ["database", "operation"]
+)
+NOTION_THROTTLE_WAIT = registry.counter(
+    "notion_throttle_wait_seconds_total", "Seconds spent waiting on the client-side rate limiter"
+)
+
+######################## CACHES ########################
+
+# cache is "reference" (the TTL cache of the list_* loaders) or "mirror" (the local SQLite mirror)
+CACHE_HITS = registry.counter("reference_cache_hits_total", "Reference data read from a local cache", ["cache", "database"])
+CACHE_MISSES = registry.counter("reference_cache_misses_total", "Reference data the cache had to load from Notion", ["cache", "database"])
+
+######################## HTTP / CSV ########################
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "Duration of the backend's HTTP requests, by route template",
+    ["method", "route", "status"]
+)
+CSV_ROWS_PROCESSED = registry.counter(
+    "csv_rows_processed_total", "CSV rows read by /process-csv and /process-csv-batch", ["engine"]
+)
+CSV_ENTRIES = registry.counter(
+    "csv_entries_total", "Categorized CSV entries returned for review", ["type"]
+)
+SAVE_JOB_DURATION = registry.histogram(
+    "save_job_duration_seconds", "Duration of the background saves to Notion",
+    ["type", "status"]
+)
+CSV_PHASE_DURATION = registry.histogram(
+    "csv_phase_duration_seconds", "Duration of each phase of process_csv (decode, fetch_reference, categorize, sort)",
+    ["phase"]
+)
+
+######################## REQUEST TIMINGS ########################
+
+class PhaseTimer:
+    """Wall time of the named phases of one request, in milliseconds (repeated phases add up)"""
+
+    def __init__(self, timings: Optional[Dict[str, float]] = None):
+        self.timings: Dict[str, float] = dict(timings or {})
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        self.timings[name] = round(self.timings.get(name, 0) + seconds * 1000, 3)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, shown in the browser devtools (Network > Timing)"""
+        return ", ".join(f"{name};dur={duration}" for name, duration in self.timings.items())
+
+
+# Profiling hooks are per interpreter on recent Pythons, profile one call at a time
+_profile_lock = threading.Lock()
+
+def profile_call(func: Callable[..., Any], *args: Any, top_n: int = 25, **kwargs: Any) -> Tuple[Any, str]:
+    """Run func under cProfile, returning its result and the top_n functions by cumulative time"""
+    with _profile_lock:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func, *args, **kwargs)
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).strip_dirs().sort_stats("cumulative").print_stats(top_n)
+    return result, report.getvalue()
@@ -0,0 +1,182 @@
+import sqlite3
+import threading
+import requests
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from .notionAPI import NotionAPIError, REFERENCE_DATABASES, database_id, fetch_reference_data, iter_reference_rows
+from .metrics import CACHE_HITS, CACHE_MISSES
+from .settings import settings
+
+MIRROR_SYNC_INTERVAL = 60         # Seconds between two incremental syncs (rows edited since the last one)
+MIRROR_FULL_SYNC_INTERVAL = 3600  # Seconds between two full resyncs, which also catch deleted rows
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class ReferenceMirror:
+    """
+    Local SQLite copy of the reference databases (accounts, types, months, ...).
+    A full sync replaces the rows of a database, keeping Notion's order; an incremental
+    sync upserts the rows edited since the high-water mark. Deleted rows only go away
+    on the next full sync, since a last_edited_time query never returns them.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.state_path  # Same local state file as the save queue
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS reference_items (
+                database TEXT NOT NULL,
+                id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                PRIMARY KEY (database, id)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS reference_sync (
+                database TEXT PRIMARY KEY,
+                high_water TEXT,
+                synced_at TEXT NOT NULL,
+                full_synced_at TEXT NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def read(self, database: str) -> Optional[List[Dict[str, str]]]:
+        """Mirrored {"id", "name"} items of a database, None if it was never synced"""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM reference_sync WHERE database = ?", (database,)).fetchone() is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT id, name FROM reference_items WHERE database = ? ORDER BY position", (database,)
+            ).fetchall()
+        return [{"id": item_id, "name": name} for item_id, name in rows]
+
+    def synced_at(self, database: str) -> Optional[str]:
+        """When the database was last synced (ISO timestamp), None if never"""
+        with self._lock:
+            row = self._conn.execute("SELECT synced_at FROM reference_sync WHERE database = ?", (database,)).fetchone()
+        return row[0] if row else None
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT database, high_water, synced_at, full_synced_at FROM reference_sync"
+            ).fetchall()
+            counts = dict(self._conn.execute(
+                "SELECT database, COUNT(*) FROM reference_items GROUP BY database"
+            ).fetchall())
+        return {
+            database: {
+                "items": counts.get(database, 0),
+                "high_water": high_water,
+                "synced_at": synced_at,
+                "full_synced_at": full_synced_at,
+            }
+            for database, high_water, synced_at, full_synced_at in rows
+        }
+
+    def _sync_state(self, database: str) -> Tuple[Optional[str], Optional[str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT high_water, full_synced_at FROM reference_sync WHERE database = ?", (database,)
+            ).fetchone()
+        return row if row else (None, None)
+
+    def sync(self, database: str, full: bool = False) -> Dict[str, Any]:
+        """
+        Bring one database up to date. Runs a full sync if asked, if the database was never
+        synced or if the last full sync is older than MIRROR_FULL_SYNC_INTERVAL.
+        Raises NotionAPIError/requests errors, leaving the mirrored rows untouched.
+        """
+        high_water, full_synced_at = self._sync_state(database)
+        if full_synced_at is None or high_water is None:
+            full = True
+        elif (datetime.now(timezone.utc) - datetime.fromisoformat(full_synced_at)).total_seconds() > MIRROR_FULL_SYNC_INTERVAL:
+            full = True
+
+        # Read everything from Notion first, so a failure halfway doesn't leave a partial mirror
+        rows = list(iter_reference_rows(database, None if full else high_water))
+        new_high_water = max([edited_at for edited_at, _, _ in rows] + ([high_water] if high_water else []), default=None)
+        now = _now()
+
+        with self._lock, self._conn:
+            if full:
+                self._conn.execute("DELETE FROM reference_items WHERE database = ?", (database,))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO reference_items VALUES (?, ?, ?, ?)",
+                    [(database, item_id, name, position)
+                     for position, (_, item_id, name) in enumerate(row for row in rows if row[2] is not None)]
+                )
+            else:
+                next_position = self._conn.execute(
+                    "SELECT COALESCE(MAX(position), -1) + 1 FROM reference_items WHERE database = ?", (database,)
+                ).fetchone()[0]
+                for _, item_id, name in rows:
+                    if name is None:  # Title cleared, list_* wouldn't return it either
+                        self._conn.execute("DELETE FROM reference_items WHERE database = ? AND id = ?", (database, item_id))
+                        continue
+                    # Edited rows keep their position, new ones go last
+                    updated = self._conn.execute(
+                        "UPDATE reference_items SET name = ? WHERE database = ? AND id = ?", (name, database, item_id)
+                    ).rowcount
+                    if not updated:
+                        self._conn.execute(
+                            "INSERT INTO reference_items VALUES (?, ?, ?, ?)", (database, item_id, name, next_position)
+                        )
+                        next_position += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reference_sync VALUES (?, ?, ?, ?)",
+                (database, new_high_water, now, now if full else full_synced_at)
+            )
+        return {"full": full, "fetched": len(rows)}
+
+    def sync_all(self, full: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Sync every configured reference database, a failing one doesn't stop the others"""
+        report = {}
+        for database, (database_name, _) in REFERENCE_DATABASES.items():
+            if not database_id(database_name):
+                continue
+            try:
+                report[database] = self.sync(database, full)
+            except (NotionAPIError, requests.RequestException) as e:
+                print(f"Error syncing {database} mirror:", e)
+                report[database] = {"full": full, "error": str(e)}
+        return report
+
+
+_mirror: Optional[ReferenceMirror] = None
+_mirror_lock = threading.Lock()
+
+
+def get_reference_mirror() -> ReferenceMirror:
+    """Shared mirror of the process, opened on first use"""
+    global _mirror
+    with _mirror_lock:
+        if _mirror is None:
+            _mirror = ReferenceMirror()
+        return _mirror
+
+
+def read_reference_data(names=None) -> Tuple[Dict[str, List[Dict[str, str]]], Dict[str, str]]:
+    """
+    Same contract as fetch_reference_data, reading the local mirror. Lists that were
+    never synced yet (e.g. right after the first start) are fetched from Notion.
+    """
+    names = list(names) if names else list(REFERENCE_DATABASES)
+    mirror = get_reference_mirror()
+    data = {name: mirror.read(name) for name in names}
+    missing = [name for name, items in data.items() if items is None]
+    for name in names:
+        (CACHE_MISSES if name in missing else CACHE_HITS).inc(cache="mirror", database=name)
+    errors = {}
+    if missing:
+        fetched, errors = fetch_reference_data(missing)
+        data.update(fetched)
+    return data, errors
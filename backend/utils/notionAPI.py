@@ -1,270 +1,348 @@
 import requests
-from datetime import datetime
-import csv
-import os
-
-# Load Notion token from file
-try:
-    with open("../api_token.txt", "r") as token_file:
-        tokenNotion = token_file.read().strip()
-except FileNotFoundError:
-    print("Error: api_token.txt file not found")
-    exit(1)
-
-
-# Define a function to load database IDs from CSV
-def load_database_ids(file_path):
-    database_ids = {}
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError, NewConnectionError
+import asyncio
+import contextlib
+import contextvars
+import functools
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+
+from .cache import cached
+from .metrics import (
+    NOTION_ERRORS, NOTION_RATE_LIMITED, NOTION_REQUEST_DURATION, NOTION_REQUESTS, NOTION_RETRIES, NOTION_THROTTLE_WAIT
+)
+from .rate_limit import TokenBucket
+from .settings import settings, DEFAULT_NOTION_API_URL
+
+# Configuration (token, database ids, API URL) is resolved lazily, see utils/settings.py
+NOTION_VERSION = "2021-08-16"
+
+def notion_headers():
+    return {
+        "Authorization": f"Bearer {settings.notion_token}",
+        "Content-Type": "application/json",
+        "Notion-Version": NOTION_VERSION
+    }
+
+######################## CLIENT ########################
+
+# Transient failures worth retrying: rate limited, or the server/gateway hiccuped
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# The ones where Notion did not apply the request, the only ones non-idempotent calls retry on
+# (a 500/502/504 may come after the page was created)
+NOT_APPLIED_STATUS_CODES = {429, 503}
+
+def _never_sent(error):
+    """True if a request failed before reaching Notion: the connection could not be opened"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+class RetryCounter:
+    """Collects how many retries the Notion calls made inside count_notion_retries()"""
+    def __init__(self):
+        self.retries = 0
+
+_retry_counter = contextvars.ContextVar("notion_retry_counter", default=None)
+
+@contextlib.contextmanager
+def count_notion_retries():
+    """
+    Count the retries of every Notion call made in this block. Works across
+    asyncio.to_thread and to_notion_thread too, since the worker thread runs in a
+    copy of our context.
+    """
+    counter = RetryCounter()
+    token = _retry_counter.set(counter)
     try:
-        with open(file_path, 'r') as csv_file:
-            csv_reader = csv.DictReader(csv_file)
-            for row in csv_reader:
-                database_ids[f"{row['database_name']}_DATABASE_ID"] = row['database_id']
-        return database_ids
-    except FileNotFoundError:
-        print(f"Error: {file_path} file not found")
-        exit(1)
-    except Exception as e:
-        print(f"Error loading database IDs: {e}")
-        exit(1)
-
-# Load database IDs from CSV file
-csv_path = "../database_ids.csv"
-db_ids = load_database_ids(csv_path)
-
-# Set variables for each database ID
-EXPENSES_DATABASE_ID = db_ids.get("EXPENSES_DATABASE_ID")
-ACCOUNTS_DATABASE_ID = db_ids.get("ACCOUNTS_DATABASE_ID")
-EXPENSE_TYPES_DATABASE_ID = db_ids.get("EXPENSE_TYPES_DATABASE_ID")
-MONTHS_DATABASE_ID = db_ids.get("MONTHS_DATABASE_ID")
-INCOMES_DATABASE_ID = db_ids.get("INCOMES_DATABASE_ID")
-INCOME_TARGET_DATABASE_ID = db_ids.get("INCOME_TARGET_DATABASE_ID")
-DEBTS_DATABASE_ID = db_ids.get("DEBTS_DATABASE_ID")
-SUBSCRIPTIONS_DATABASE_ID = db_ids.get("SUBSCRIPTIONS_DATABASE_ID")
-TRANSFER_DATABASE_ID = db_ids.get("TRANSFER_DATABASE_ID")
-SAVINGS_DATABASE_ID = db_ids.get("SAVINGS_DATABASE_ID")
-
-headers = {
-    "Authorization": f"Bearer {tokenNotion}",
-    "Content-Type": "application/json",
-    "Notion-Version": "2021-08-16"
+        yield counter
+    finally:
+        _retry_counter.reset(token)
+
+def _call_labels(path, payload=None):
+    """Metric labels of a Notion call: the database name (as in database_ids.csv) and the operation"""
+    parts = path.split("/")
+    if parts[0] == "databases" and len(parts) > 1:
+        target, operation = parts[1], parts[2] if len(parts) > 2 else "retrieve"
+    elif parts[0] == "pages":
+        target, operation = ((payload or {}).get("parent") or {}).get("database_id"), "create"
+    else:
+        target, operation = None, parts[0]
+    # Unknown ids are grouped, so the label values stay bounded
+    name = settings.database_name(target) if target else None
+    return {"database": name.lower() if name else "other", "operation": operation}
+
+class NotionClient:
+    """
+    Notion API client backed by a pooled, keep-alive requests.Session.
+    Reusing the session avoids a new TCP+TLS handshake on every call.
+    Transient failures (429, 5xx, connection resets) are retried with backoff.
+    """
+
+    def __init__(self, headers, base_url=DEFAULT_NOTION_API_URL, pool_size=10, timeout=(5, 30), keep_alive=True, rate_limiter=None,
+                 max_attempts=5, backoff_base=0.5, backoff_max=30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout  # (connect, read) seconds
+        self.rate_limiter = rate_limiter  # Optional TokenBucket every request waits on
+        self.max_attempts = max_attempts  # Total attempts per call, including the first one
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        self.session.headers["Connection"] = "keep-alive" if keep_alive else "close"
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _backoff_delay(self, attempt, response=None):
+        """Seconds to wait before the next attempt, honoring Retry-After on 429"""
+        if response is not None and response.status_code == 429:
+            retry_after = response.headers.get("Retry-After")
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except (TypeError, ValueError):
+                pass
+        # Exponential backoff with jitter so concurrent workers don't retry in lockstep
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    def request(self, method, path, payload=None, idempotent=True):
+        """
+        Send a request to the Notion API and return the decoded JSON body.
+        Non-idempotent calls (page creation) are only repeated when Notion can't have
+        applied them: a 429/503 answer, or a connection that could not be opened.
+        """
+        counter = _retry_counter.get()
+        labels = _call_labels(path, payload)
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                NOTION_THROTTLE_WAIT.inc(self.rate_limiter.acquire())
+
+            response = None
+            start = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method,
+                    f"{self.base_url}/{path}",
+                    json=payload,
+                    timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                NOTION_REQUEST_DURATION.observe(time.perf_counter() - start, **labels)
+                NOTION_REQUESTS.inc(status=type(e).__name__, **labels)
+                retryable = idempotent or _never_sent(e)
+                if not retryable or attempt + 1 >= self.max_attempts:
+                    NOTION_ERRORS.inc(**labels)
+                    raise
+                print(f"Notion {method} {path} failed ({type(e).__name__}), retrying")
+            else:
+                NOTION_REQUEST_DURATION.observe(time.perf_counter() - start, **labels)
+                NOTION_REQUESTS.inc(status=str(response.status_code), **labels)
+                if response.status_code == 429:
+                    NOTION_RATE_LIMITED.inc(**labels)
+                retry_statuses = RETRY_STATUS_CODES if idempotent else NOT_APPLIED_STATUS_CODES
+                if response.status_code not in retry_statuses or attempt + 1 >= self.max_attempts:
+                    if response.status_code >= 400:
+                        NOTION_ERRORS.inc(**labels)
+                    return response.json()
+                print(f"Notion {method} {path} returned {response.status_code}, retrying")
+
+            time.sleep(self._backoff_delay(attempt, response))
+            attempt += 1
+            NOTION_RETRIES.inc(**labels)
+            if counter is not None:
+                counter.retries += 1
+
+    def query_database(self, database_id, payload=None):
+        """Query a database (POST /databases/{id}/query)"""
+        return self.request("POST", f"databases/{database_id}/query", payload or {})
+
+    def create_page(self, payload):
+        """Create a page (POST /pages)"""
+        return self.request("POST", "pages", payload, idempotent=False)
+
+    def get_database(self, database_id):
+        """Retrieve a database object (GET /databases/{id})"""
+        return self.request("GET", f"databases/{database_id}")
+
+    def warm_up(self, connections=1):
+        """Open pooled connections ahead of the first call, so it doesn't pay the TCP+TLS handshakes"""
+        def connect(_):
+            try:
+                self.session.head(self.base_url, timeout=self.timeout)
+            except requests.RequestException as e:
+                print(f"Could not open a connection to Notion ({type(e).__name__})")
+        # Concurrent requests, each one needs its own connection
+        with ThreadPoolExecutor(max_workers=connections) as pool:
+            list(pool.map(connect, range(connections)))
+
+    def close(self):
+        self.session.close()
+
+# Notion allows an average of ~3 requests per second per integration, with short bursts
+NOTION_RATE_LIMIT = 3
+NOTION_RATE_BURST = 10
+
+_notion_client = None
+_notion_client_lock = threading.Lock()
+
+def get_notion_client():
+    """Shared client used by every list/create function below, created on first use from the settings"""
+    global _notion_client
+    with _notion_client_lock:
+        if _notion_client is None:
+            _notion_client = NotionClient(
+                notion_headers(),
+                base_url=settings.notion_api_url,
+                rate_limiter=TokenBucket(NOTION_RATE_LIMIT, NOTION_RATE_BURST)
+            )
+        return _notion_client
+
+def database_id(name):
+    """Id of a Finance OS database by its name in database_ids.csv (e.g. "EXPENSES")"""
+    return settings.database_id(name)
+
+# Seconds each list_* result is cached for. The listing routes serve the local
+# mirror (utils/mirror.py) instead, which syncs rows edited in Notion every
+# MIRROR_SYNC_INTERVAL and resyncs fully every MIRROR_FULL_SYNC_INTERVAL
+# (or on POST /mirror/sync?full=true); this cache only backs them until the
+# mirror's first sync.
+REFERENCE_CACHE_TTLS = {
+    "accounts": 3600,
+    "expense_types": 3600,
+    "income_types": 3600,
+    "months": 900,  # New months get added over time
+    "subscriptions": 3600,
+    "debts": 900,
+    "savings": 900,
 }
 
+######################## PAGINATION ########################
+
+NOTION_MAX_PAGE_SIZE = 100
+
+class NotionAPIError(Exception):
+    """Raised when Notion answers with an error object instead of results"""
+
+def iter_database_pages(database_id, payload=None):
+    """
+    Query a database following has_more/next_cursor, yielding the results of
+    each page as soon as it arrives. Raises NotionAPIError on an error response.
+    """
+    payload = dict(payload or {})
+    payload["page_size"] = NOTION_MAX_PAGE_SIZE
+    
+    while True:
+        data = get_notion_client().query_database(database_id, payload)
+        if "results" not in data:
+            raise NotionAPIError(data.get("message", "Unknown error from Notion API"))
+        
+        yield data["results"]
+        
+        if not data.get("has_more") or not data.get("next_cursor"):
+            return
+        payload["start_cursor"] = data["next_cursor"]
+
+def iter_database(database_id, payload=None):
+    """Same as iter_database_pages but yields the pages (rows) one by one"""
+    for results in iter_database_pages(database_id, payload):
+        yield from results
+
+def list_titled_items(database_id, title_property, label):
+    """
+    Collect {"id", "name"} for every row of a database, using its title property.
+    Raises NotionAPIError rather than returning a truncated (or empty) list.
+    """
+    items = []
+    try:
+        for row in iter_database(database_id):
+            title = row["properties"][title_property]["title"]
+            if title:
+                items.append({"id": row["id"], "name": title[0]["text"]["content"]})
+    except NotionAPIError as e:
+        raise NotionAPIError(f"Error retrieving {label}: {e}") from e
+    
+    return items
+
 ######################## ACCOUNTS ########################
 
 def get_accounts():
-    """Retrieve all accounts from the Accounts database"""
-    url = f"https://api.notion.com/v1/databases/{ACCOUNTS_DATABASE_ID}/query"
-    
-    payload = {
-        "page_size": 10
-    }
-    
-    response = requests.post(url, headers=headers, json=payload)
-    return response.json()
+    """Retrieve all accounts from the Accounts database, page by page"""
+    return iter_database_pages(database_id("ACCOUNTS"))
 
+@cached("accounts", REFERENCE_CACHE_TTLS["accounts"])
 def list_accounts():
     """List all available accounts with their IDs"""
-    accounts_data = get_accounts()
-    
-    if "results" not in accounts_data:
-        print("Error retrieving accounts:", accounts_data.get("message", ""))
-        return []
-    
-    accounts = []
-    for account in accounts_data["results"]:
-        title_property = "Account Name"
-        
-        if title_property and account["properties"][title_property]["title"]:
-            account_name = account["properties"][title_property]["title"][0]["text"]["content"]
-            account_id = account["id"]
-            accounts.append({"id": account_id, "name": account_name})
-    
-    return accounts
+    return list_titled_items(database_id("ACCOUNTS"), "Account Name", "accounts")
 
 ######################### EXPENSE TYPES ########################
 def get_expense_types():
-    """Retrieve all expense types from the database"""
-    url = f"https://api.notion.com/v1/databases/{EXPENSE_TYPES_DATABASE_ID}/query"
-    
-    payload = {
-        "page_size": 100  # Adjust if you have more expense types
-    }
-    
-    response = requests.post(url, headers=headers, json=payload)
-    return response.json()
+    """Retrieve all expense types from the database, page by page"""
+    return iter_database_pages(database_id("EXPENSE_TYPES"))
 
+@cached("expense_types", REFERENCE_CACHE_TTLS["expense_types"])
 def list_expense_types():
     """List all available expense types with their IDs"""
-    expense_types_data = get_expense_types()
-    
-    if "results" not in expense_types_data:
-        print("Error retrieving expense types:", expense_types_data.get("message", ""))
-        return []
-    
-    expense_types = []
-    for expense_type in expense_types_data["results"]:
-        # Find the title property (adjust based on your database structure)
-        title_property = "Expense Type"
-        
-        if title_property and expense_type["properties"][title_property]["title"]:
-            type_name = expense_type["properties"][title_property]["title"][0]["text"]["content"]
-            type_id = expense_type["id"]
-            expense_types.append({"id": type_id, "name": type_name})
-    
-    return expense_types
+    return list_titled_items(database_id("EXPENSE_TYPES"), "Expense Type", "expense types")
 
 ######################### MONTHS ########################
 def get_months():
-    """Retrieve all months from the database"""
-    url = f"https://api.notion.com/v1/databases/{MONTHS_DATABASE_ID}/query"
-    payload = {"page_size": 100}
-    response = requests.post(url, headers=headers, json=payload)
-    return response.json()
+    """Retrieve all months from the database, page by page"""
+    return iter_database_pages(database_id("MONTHS"))
 
+@cached("months", REFERENCE_CACHE_TTLS["months"])
 def list_months():
     """List all available months with their IDs"""
-    months_data = get_months()
-    
-    if "results" not in months_data:
-        print("Error retrieving months:", months_data.get("message", ""))
-        return []
-    
-    months = []
-    for month in months_data["results"]:
-        # Find the title property (adjust based on your database structure)
-        title_property = "Month"
-        
-        if title_property and month["properties"][title_property]["title"]:
-            month_name = month["properties"][title_property]["title"][0]["text"]["content"]
-            month_id = month["id"]
-            months.append({"id": month_id, "name": month_name})
-    
-    return months
+    return list_titled_items(database_id("MONTHS"), "Month", "months")
 
 ######################### INCOME TYPES ########################
 def get_income_types():
-    """Retrieve all income types from the database"""
-    url = f"https://api.notion.com/v1/databases/{INCOME_TARGET_DATABASE_ID}/query"
-    
-    payload = {
-        "page_size": 100  # Adjust if you have more income types
-    }
-    
-    response = requests.post(url, headers=headers, json=payload)
-    return response.json()
+    """Retrieve all income types from the database, page by page"""
+    return iter_database_pages(database_id("INCOME_TARGET"))
 
+@cached("income_types", REFERENCE_CACHE_TTLS["income_types"])
 def list_income_types():
     """List all available income types with their IDs"""
-    income_types_data = get_income_types()
-    
-    if "results" not in income_types_data:
-        print("Error retrieving income types:", income_types_data.get("message", ""))
-        return []
-    
-    income_types = []
-    for income_type in income_types_data["results"]:
-        title_property = "Income Type"
-        
-        if title_property and income_type["properties"][title_property]["title"]:
-            type_name = income_type["properties"][title_property]["title"][0]["text"]["content"]
-            type_id = income_type["id"]
-            income_types.append({"id": type_id, "name": type_name})
-    
-    return income_types
+    return list_titled_items(database_id("INCOME_TARGET"), "Income Type", "income types")
 
 ######################### SUBSCRIPTIONS ########################
 def get_subscriptions():
-    """Retrieve all subscriptions from the database"""
-    url = f"https://api.notion.com/v1/databases/{SUBSCRIPTIONS_DATABASE_ID}/query"
-    
-    payload = {
-        "page_size": 100
-    }
-    
-    response = requests.post(url, headers=headers, json=payload)
-    return response.json()
+    """Retrieve all subscriptions from the database, page by page"""
+    return iter_database_pages(database_id("SUBSCRIPTIONS"))
 
+@cached("subscriptions", REFERENCE_CACHE_TTLS["subscriptions"])
 def list_subscriptions():
     """List all available subscriptions with their IDs"""
-    subscriptions_data = get_subscriptions()
-    
-    if "results" not in subscriptions_data:
-        print("Error retrieving subscriptions:", subscriptions_data.get("message", ""))
-        return []
-    
-    subscriptions = []
-    for subscription in subscriptions_data["results"]:
-        title_property = "Name"
-        
-        if title_property and subscription["properties"][title_property]["title"]:
-            sub_name = subscription["properties"][title_property]["title"][0]["text"]["content"]
-            sub_id = subscription["id"]
-            subscriptions.append({"id": sub_id, "name": sub_name})
-    
-    return subscriptions
+    return list_titled_items(database_id("SUBSCRIPTIONS"), "Name", "subscriptions")
 
 ######################### DEBTS ########################
 def get_debts():
-    """Retrieve all debts from the database"""
-    url = f"https://api.notion.com/v1/databases/{DEBTS_DATABASE_ID}/query"
-    
-    payload = {
-        "page_size": 100
-    }
-    
-    response = requests.post(url, headers=headers, json=payload)
-    return response.json()
+    """Retrieve all debts from the database, page by page"""
+    return iter_database_pages(database_id("DEBTS"))
 
+@cached("debts", REFERENCE_CACHE_TTLS["debts"])
 def list_debts():
     """List all available debts with their IDs"""
-    debts_data = get_debts()
-    
-    if "results" not in debts_data:
-        print("Error retrieving debts:", debts_data.get("message", ""))
-        return []
-    
-    debts = []
-    for debt in debts_data["results"]:
-        title_property = "Debt"
-        
-        if title_property and debt["properties"][title_property]["title"]:
-            debt_name = debt["properties"][title_property]["title"][0]["text"]["content"]
-            debt_id = debt["id"]
-            debts.append({"id": debt_id, "name": debt_name})
-    
-    return debts
+    return list_titled_items(database_id("DEBTS"), "Debt", "debts")
 
 ######################### SAVINGS ########################
 def get_savings():
-    """Retrieve all savings accounts from the database"""
-    url = f"https://api.notion.com/v1/databases/{SAVINGS_DATABASE_ID}/query"
-    
-    payload = {
-        "page_size": 100
-    }
-    
-    response = requests.post(url, headers=headers, json=payload)
-    return response.json()
+    """Retrieve all savings accounts from the database, page by page"""
+    return iter_database_pages(database_id("SAVINGS"))
 
+@cached("savings", REFERENCE_CACHE_TTLS["savings"])
 def list_savings():
     """List all available savings with their IDs"""
-    savings_data = get_savings()
-    
-    if "results" not in savings_data:
-        print("Error retrieving savings:", savings_data.get("message", ""))
-        return []
-    
-    savings = []
-    for saving in savings_data["results"]:
-        title_property = "Name"  # Adjust based on your actual title property
-        
-        if title_property and saving["properties"][title_property]["title"]:
-            saving_name = saving["properties"][title_property]["title"][0]["text"]["content"]
-            saving_id = saving["id"]
-            savings.append({"id": saving_id, "name": saving_name})
-    
-    return savings
+    return list_titled_items(database_id("SAVINGS"), "Name", "savings")  # Adjust based on your actual title property
 
 ######################## EXPENSES ########################
 
@@ -362,7 +440,7 @@ def create_expense(date, name, concept, amount, account_id=None, expense_type_id
     
     # Prepare the payload
     payload = {
-        "parent": {"database_id": EXPENSES_DATABASE_ID},
+        "parent": {"database_id": database_id("EXPENSES")},
         "properties": properties,
         "icon": {
             "type": "external",
@@ -373,13 +451,7 @@ def create_expense(date, name, concept, amount, account_id=None, expense_type_id
     }
     
     # Send the request to create the page
-    response = requests.post(
-        "https://api.notion.com/v1/pages",
-        headers=headers,
-        json=payload
-    )
-    
-    return response.json()
+    return get_notion_client().create_page(payload)
 
 ######################## INCOMES ########################
 
@@ -448,7 +520,7 @@ def create_income(date, name, concept, amount, account_id=None, month_id=None, i
     
     # Prepare the payload
     payload = {
-        "parent": {"database_id": INCOMES_DATABASE_ID},
+        "parent": {"database_id": database_id("INCOMES")},
         "properties": properties,
         "icon": {
             "type": "external",
@@ -459,13 +531,7 @@ def create_income(date, name, concept, amount, account_id=None, month_id=None, i
     }
     
     # Send the request to create the page
-    response = requests.post(
-        "https://api.notion.com/v1/pages",
-        headers=headers,
-        json=payload
-    )
-    
-    return response.json()
+    return get_notion_client().create_page(payload)
 
 ######################### TRANSFERS ########################
 def create_transfer(
@@ -565,7 +631,7 @@ def create_transfer(
     
     # Prepare the payload
     payload = {
-        "parent": {"database_id": TRANSFER_DATABASE_ID},
+        "parent": {"database_id": database_id("TRANSFER")},
         "properties": properties,
         "icon": {
             "type": "external",
@@ -576,19 +642,11 @@ def create_transfer(
     }
     
     # Send the request to create the page
-    response = requests.post(
-        "https://api.notion.com/v1/pages",
-        headers=headers,
-        json=payload
-    )
-    
-    return response.json()
+    return get_notion_client().create_page(payload)
 
 def get_database_schema(database_id):
     """Get the schema of a database to see exact property names"""
-    url = f"https://api.notion.com/v1/databases/{database_id}"
-    response = requests.get(url, headers=headers)
-    data = response.json()
+    data = get_notion_client().get_database(database_id)
     
     if "properties" in data:
         print("\nAvailable properties:")
@@ -600,6 +658,164 @@ def get_database_schema(database_id):
     
     return data
 
+######################### TRANSACTION HARVEST ########################
+
+# Transaction databases: (name in database_ids.csv, concept property, account relations by preference),
+# matching the properties written by create_expense/create_income/create_transfer.
+# Transfers have no Note, their title is the closest thing to the bank concept.
+TRANSACTION_DATABASES = {
+    "expenses": ("EXPENSES", "Note", ["Accounts"]),
+    "incomes": ("INCOMES", "Note", ["Account"]),
+    "transfers": ("TRANSFER", "Transfer", ["To Acc", "From Acc"]),
+}
+
+def edited_since_payload(edited_since=None):
+    """Query payload sorting by last edit, only matching pages edited on or after edited_since if given"""
+    payload = {"sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}]}
+    if edited_since:
+        payload["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": edited_since}}
+    return payload
+
+def _plain_text(prop):
+    """Text of a title/rich_text property"""
+    return "".join(part.get("plain_text", "") for part in prop.get(prop.get("type"), []) or [])
+
+def _transaction_from_row(name, row):
+    """(page_id, date, concept, amount, account_id) of a page of one of TRANSACTION_DATABASES, None without a date or amount"""
+    _, concept_property, account_properties = TRANSACTION_DATABASES[name]
+    properties = row["properties"]
+    date = ((properties.get("Date") or {}).get("date") or {}).get("start")
+    amount = (properties.get("Amount") or {}).get("number")
+    if not date or amount is None:
+        return None
+    concept = _plain_text(properties.get(concept_property) or {})
+    account_id = next(
+        (relation[0]["id"] for relation in
+         ((properties.get(prop) or {}).get("relation") for prop in account_properties) if relation),
+        None
+    )
+    return row["id"], date[:10], concept, amount, account_id
+
+def iter_transactions(name, edited_since=None):
+    """
+    Yield (last_edited_time, (page_id, date, concept, amount, account_id)) for the pages of one of
+    TRANSACTION_DATABASES, oldest edit first. edited_since (ISO timestamp) restricts the
+    query to pages edited on or after it. Pages without a date or amount are skipped.
+    """
+    database_name = TRANSACTION_DATABASES[name][0]
+    for row in iter_database(database_id(database_name), edited_since_payload(edited_since)):
+        transaction = _transaction_from_row(name, row)
+        if transaction:
+            yield row["last_edited_time"], transaction
+
+def find_transactions(name, date):
+    """Yield (page_id, date, concept, amount, account_id) for the pages of one of TRANSACTION_DATABASES dated date"""
+    database_name = TRANSACTION_DATABASES[name][0]
+    payload = {"filter": {"property": "Date", "date": {"equals": date}}}
+    for row in iter_database(database_id(database_name), payload):
+        transaction = _transaction_from_row(name, row)
+        if transaction and transaction[1] == date:
+            yield transaction
+
+######################### REFERENCE DATA ########################
+
+REFERENCE_LOADERS = {
+    "accounts": list_accounts,
+    "expense_types": list_expense_types,
+    "income_types": list_income_types,
+    "months": list_months,
+    "subscriptions": list_subscriptions,
+    "debts": list_debts,
+    "savings": list_savings,
+}
+
+# Database (name in database_ids.csv) and title property of every reference list, as read by the list_* functions
+REFERENCE_DATABASES = {
+    "accounts": ("ACCOUNTS", "Account Name"),
+    "expense_types": ("EXPENSE_TYPES", "Expense Type"),
+    "income_types": ("INCOME_TARGET", "Income Type"),
+    "months": ("MONTHS", "Month"),
+    "subscriptions": ("SUBSCRIPTIONS", "Name"),
+    "debts": ("DEBTS", "Debt"),
+    "savings": ("SAVINGS", "Name"),
+}
+
+def iter_reference_rows(name, edited_since=None):
+    """
+    Yield (last_edited_time, id, name) for the rows of one of REFERENCE_DATABASES, name being
+    None for rows with an empty title. Without edited_since every row is read in the
+    default order (the one of list_*), with it only rows edited since then, oldest edit first.
+    """
+    database_name, title_property = REFERENCE_DATABASES[name]
+    payload = edited_since_payload(edited_since) if edited_since else None
+    for row in iter_database(database_id(database_name), payload):
+        title = row["properties"][title_property]["title"]
+        yield row["last_edited_time"], row["id"], title[0]["text"]["content"] if title else None
+
+REFERENCE_FETCH_TIMEOUT = 20  # Seconds, shared by all lists of one fetch_reference_data call
+
+_reference_pool = ThreadPoolExecutor(max_workers=len(REFERENCE_LOADERS), thread_name_prefix="notion-reference")
+
+def fetch_reference_data(names=None, timeout=REFERENCE_FETCH_TIMEOUT):
+    """
+    Fetch several reference lists concurrently, so the total latency is that of the
+    slowest query. Returns (data, errors): a list that raised or missed the shared
+    deadline comes back empty in data and its reason is reported in errors.
+    """
+    names = list(names) if names else list(REFERENCE_LOADERS)
+    futures = {name: _reference_pool.submit(REFERENCE_LOADERS[name]) for name in names}
+    done, _ = wait(futures.values(), timeout=timeout)
+
+    data, errors = {}, {}
+    for name, future in futures.items():
+        data[name] = []
+        if future not in done:
+            future.cancel()
+            errors[name] = f"timed out after {timeout}s"
+        elif future.exception() is not None:
+            errors[name] = f"{type(future.exception()).__name__}: {future.exception()}"
+        else:
+            data[name] = future.result()
+
+    for name, error in errors.items():
+        print(f"Error retrieving {name}: {error}")
+    return data, errors
+
+######################### ASYNC ########################
+# Awaitable variants for the FastAPI routes. The blocking call runs on a worker
+# thread (sharing the pooled get_notion_client()), so a slow Notion round trip never
+# blocks the event loop and concurrent requests overlap.
+# Notion calls can spend seconds in backoff sleeps and rate limiter waits, so they
+# get their own threads instead of asyncio's default executor, which the job queue
+# and the SQLite calls share.
+
+NOTION_THREADS = 10  # One per pooled connection of the client
+
+_notion_pool = ThreadPoolExecutor(max_workers=NOTION_THREADS, thread_name_prefix="notion")
+
+async def to_notion_thread(func, *args, **kwargs):
+    """Like asyncio.to_thread, on the Notion threads (func runs in a copy of our context)"""
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_notion_pool, call)
+
+def _to_async(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await to_notion_thread(func, *args, **kwargs)
+    wrapper.__name__ = f"a{func.__name__}"
+    return wrapper
+
+alist_accounts = _to_async(list_accounts)
+alist_expense_types = _to_async(list_expense_types)
+alist_months = _to_async(list_months)
+alist_income_types = _to_async(list_income_types)
+alist_subscriptions = _to_async(list_subscriptions)
+alist_debts = _to_async(list_debts)
+alist_savings = _to_async(list_savings)
+acreate_expense = _to_async(create_expense)
+acreate_income = _to_async(create_income)
+acreate_transfer = _to_async(create_transfer)
+
 if __name__ == "__main__":
     import json
     # Read CSV file
@@ -609,7 +825,7 @@ if __name__ == "__main__":
     #         process_csv_row(row)
     
     # For testing, just create one expense
-    # get_database_schema(INCOMES_DATABASE_ID)
+    # get_database_schema(database_id("INCOMES"))
     
     print("Available accounts:")
     accounts = list_accounts()
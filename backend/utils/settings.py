@@ -0,0 +1,119 @@
+import csv
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+# Repository root, where api_token.txt and database_ids.csv live (whatever the working directory)
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+DEFAULT_NOTION_API_URL = "https://api.notion.com/v1"
+
+
+class ConfigurationError(Exception):
+    """Raised when a required setting (Notion token, database ids file) can't be resolved"""
+
+
+class Settings:
+    """
+    Backend configuration, resolved lazily on first access (importing the backend does no I/O).
+    Every value can be given explicitly with configure(), through an environment variable,
+    or falls back to the files of the repository root:
+
+    - NOTION_API_TOKEN, or the file NOTION_API_TOKEN_FILE (default api_token.txt)
+    - FINANCE_OS_DATABASE_IDS_FILE (default database_ids.csv), each id overridable
+      with <NAME>_DATABASE_ID (e.g. EXPENSES_DATABASE_ID)
+    - NOTION_API_URL (default the public Notion API)
+    - FINANCE_OS_STATE_PATH, SQLite file of the queue, mirror and duplicate index (default finance_os.sqlite3)
+    """
+
+    def __init__(self, **overrides: Any):
+        self._lock = threading.Lock()
+        self._overrides: Dict[str, Any] = dict(overrides)
+        self._values: Dict[str, Any] = {}
+
+    def configure(self, **overrides: Any):
+        """Set values explicitly (token, token_path, database_ids_path, notion_api_url, state_path), before first use"""
+        with self._lock:
+            self._overrides.update(overrides)
+            self._values.clear()
+
+    def overrides(self) -> Dict[str, Any]:
+        """Values given with configure(), e.g. to configure a worker process the same way"""
+        with self._lock:
+            return dict(self._overrides)
+
+    def _resolve(self, name: str, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            if name not in self._values:
+                self._values[name] = self._overrides[name] if name in self._overrides else loader()
+            return self._values[name]
+
+    def _path(self, name: str, env_var: str, default: str) -> Path:
+        return Path(self._overrides.get(name) or os.environ.get(env_var) or REPO_ROOT / default)
+
+    @property
+    def notion_token(self) -> str:
+        return self._resolve("token", self._load_token)
+
+    def _load_token(self) -> str:
+        if os.environ.get("NOTION_API_TOKEN"):
+            return os.environ["NOTION_API_TOKEN"].strip()
+        path = self._path("token_path", "NOTION_API_TOKEN_FILE", "api_token.txt")
+        try:
+            return path.read_text().strip()
+        except FileNotFoundError:
+            raise ConfigurationError(f"Notion token not found: set NOTION_API_TOKEN or create {path}")
+
+    @property
+    def database_ids(self) -> Dict[str, str]:
+        """{"EXPENSES": id, "ACCOUNTS": id, ...} as listed in database_ids.csv"""
+        return self._resolve("database_ids", self._load_database_ids)
+
+    def _load_database_ids(self) -> Dict[str, str]:
+        path = self._path("database_ids_path", "FINANCE_OS_DATABASE_IDS_FILE", "database_ids.csv")
+        try:
+            with open(path, "r") as csv_file:
+                return {row["database_name"]: row["database_id"] for row in csv.DictReader(csv_file)}
+        except FileNotFoundError:
+            raise ConfigurationError(f"Database ids file not found: {path}")
+        except Exception as e:
+            raise ConfigurationError(f"Error loading database IDs from {path}: {e}")
+
+    def database_id(self, name: str) -> Optional[str]:
+        """Id of a Finance OS database by its name in database_ids.csv (e.g. "EXPENSES")"""
+        return os.environ.get(f"{name}_DATABASE_ID") or self.database_ids.get(name)
+
+    def database_name(self, database_id: str) -> Optional[str]:
+        """
+        Reverse of database_id(), None for an id that isn't configured.
+        Called on every Notion request, so the map is built once (until the next configure()).
+        """
+        names = self._values.get("database_names")
+        if names is None:
+            try:
+                database_ids = self.database_ids
+            except ConfigurationError:  # Every id may come from the environment
+                database_ids = {}
+            names = self._resolve("database_names", lambda: self._load_database_names(database_ids))
+        return names.get(database_id)
+
+    def _load_database_names(self, database_ids: Dict[str, str]) -> Dict[str, str]:
+        names: Dict[str, str] = {}
+        for key, value in os.environ.items():  # <NAME>_DATABASE_ID wins over the file
+            if key.endswith("_DATABASE_ID"):
+                names.setdefault(value, key[:-len("_DATABASE_ID")])
+        for name, value in database_ids.items():
+            names.setdefault(value, name)
+        return names
+
+    @property
+    def notion_api_url(self) -> str:
+        return self._resolve("notion_api_url", lambda: os.environ.get("NOTION_API_URL", DEFAULT_NOTION_API_URL))
+
+    @property
+    def state_path(self) -> str:
+        return str(self._resolve("state_path", lambda: self._path("state_path", "FINANCE_OS_STATE_PATH", "finance_os.sqlite3")))
+
+
+settings = Settings()
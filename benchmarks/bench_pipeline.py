@@ -0,0 +1,176 @@
+"""
+Benchmarks of the CSV categorization pipeline, Notion stubbed out (a prebuilt
+CategorizationContext is passed in, the duplicate index is an empty temporary file).
+
+    python benchmarks/bench_pipeline.py                       # 1k, 100k and 1M rows
+    python benchmarks/bench_pipeline.py --sizes 1000 100000 --output before.json
+    python benchmarks/bench_pipeline.py --sizes 100000 --compare before.json
+
+Every stage is timed on its own (best of --repeat runs, memoized helpers cleared
+before each run) and, in a separate run, traced with tracemalloc for its peak memory.
+Results are printed as a table and written as JSON, with the commit they were taken at.
+"""
+import argparse
+import contextlib
+import csv
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "backend"))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from utils.settings import settings  # noqa: E402
+from utils import csv_processor  # noqa: E402
+import synthetic  # noqa: E402
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+
+
+def _clear_memoization():
+    csv_processor.parse_date.cache_clear()
+    csv_processor.get_month_names.cache_clear()
+
+
+def _measure(func: Callable[[], Any], repeat: int, trace_memory: bool) -> Dict[str, Optional[float]]:
+    """Best wall time of repeat runs, then peak traced memory of one more run"""
+    quiet = lambda: contextlib.redirect_stdout(io.StringIO())  # process_csv logs its progress
+    best = float("inf")
+    for _ in range(repeat):
+        _clear_memoization()
+        gc.collect()
+        with quiet():
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+
+    peak_mb = None
+    if trace_memory:
+        # Separate run: tracemalloc slows the code down several times
+        _clear_memoization()
+        gc.collect()
+        with quiet():
+            tracemalloc.start()
+            func()
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return {"seconds": best, "peak_mb": peak_mb}
+
+
+def pipeline_stages(contents: bytes, context: csv_processor.CategorizationContext) -> Dict[str, Callable[[], Any]]:
+    """Stage name -> callable, every one fed with precomputed inputs"""
+    rows = list(csv.DictReader(io.StringIO(contents.decode("utf-8-sig"))))
+    amounts = [row["IMPORT"] for row in rows]
+    dates = [row["DATE"] for row in rows]
+    with contextlib.redirect_stdout(io.StringIO()):
+        entries = csv_processor.process_csv(contents, "bench.csv", context=context)["entries"]
+    unsorted_entries = list(reversed(entries))
+    result = {"status": "success", "entries": entries}
+
+    def categorize_rows():
+        for i, row in enumerate(rows):
+            csv_processor.categorize_transaction(row, i, context, "bench.csv")
+
+    return {
+        "decode_and_parse": lambda: list(csv.DictReader(io.StringIO(contents.decode("utf-8-sig")))),
+        "fix_number_format": lambda: [csv_processor.fix_number_format(amount) for amount in amounts],
+        "get_month_from_date": lambda: [csv_processor.get_month_from_date(d, context.month_ids) for d in dates],
+        "categorize_transaction": categorize_rows,
+        "categorize_columns": lambda: csv_processor.categorize_columns(rows, context, "bench.csv", csv_processor.new_stats()),
+        "sort_by_date": lambda: sorted(unsorted_entries, key=lambda x: csv_processor.parse_date(x["date"])),
+        "serialize_json": lambda: json.dumps(result),
+        "process_csv[rows]": lambda: csv_processor.process_csv(contents, "bench.csv", context=context),
+        "process_csv[columnar]": lambda: csv_processor.process_csv(contents, "bench.csv", engine="columnar", context=context),
+    }
+
+
+def run(sizes: List[int], repeat: int, trace_memory: bool, seed: int) -> List[Dict[str, Any]]:
+    # Realistic keyword tables, and the context Notion would have provided
+    csv_processor.EXPENSE_KEYWORDS.clear(); csv_processor.EXPENSE_KEYWORDS.update(synthetic.EXPENSE_KEYWORDS)
+    csv_processor.INCOME_KEYWORDS.clear(); csv_processor.INCOME_KEYWORDS.update(synthetic.INCOME_KEYWORDS)
+    csv_processor.rebuild_keyword_matchers()
+    context = csv_processor.CategorizationContext.from_reference_data(synthetic.reference_data())
+
+    results = []
+    for size in sizes:
+        contents = synthetic.generate_csv(size, seed)
+        # Large inputs are only run once, the noise is small next to their duration
+        size_repeat = repeat if size < 1000000 else 1
+        for stage, func in pipeline_stages(contents, context).items():
+            measurement = _measure(func, size_repeat, trace_memory)
+            result = {
+                "stage": stage,
+                "rows": size,
+                "seconds": round(measurement["seconds"], 6),
+                "rows_per_sec": round(size / measurement["seconds"]) if measurement["seconds"] else None,
+                "peak_mb": round(measurement["peak_mb"], 2) if measurement["peak_mb"] is not None else None,
+            }
+            results.append(result)
+            print(f"{size:>9} rows  {stage:<24} {result['seconds']:>10.4f}s  {result['rows_per_sec'] or 0:>12,} rows/s"
+                  + (f"  {result['peak_mb']:>9.2f} MB" if result["peak_mb"] is not None else ""), flush=True)
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARKS_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str):
+    """Print the speed-up of every stage against a previous JSON report"""
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    before = {(r["stage"], r["rows"]): r for r in baseline["results"]}
+    print(f"\nCompared to {baseline_path} (commit {baseline.get('commit')}):")
+    for result in results:
+        previous = before.get((result["stage"], result["rows"]))
+        if previous and result["seconds"]:
+            print(f"{result['rows']:>9} rows  {result['stage']:<24} x{previous['seconds'] / result['seconds']:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Rows per synthetic extract")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage, the best one is kept")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc runs")
+    parser.add_argument("--output", default="bench_results.json", help="JSON report path")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        # Empty duplicate index, so no row is skipped and the real local state is untouched
+        settings.configure(state_path=os.path.join(state_dir, "bench.sqlite3"))
+        results = run(args.sizes, args.repeat, not args.no_memory, args.seed)
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"\nReport written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
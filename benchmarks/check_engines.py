@@ -0,0 +1,107 @@
+"""
+Checks that the CSV engines agree: categorize_columns against categorize_transaction
+(through iter_categorized_rows), and process_csv with engine="rows" against "columnar",
+on synthetic extracts. Notion is stubbed out like in bench_pipeline.py.
+
+    python benchmarks/check_engines.py                        # 1k and 20k rows, 3 seeds
+    python benchmarks/check_engines.py --sizes 60000 --workers 2
+
+Both engines implement the categorization rules, run this after changing either of them.
+Exits with status 1 and prints the first differing entry if they disagree.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import os
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "backend"))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from utils.settings import settings  # noqa: E402
+from utils import csv_processor  # noqa: E402
+import synthetic  # noqa: E402
+
+DEFAULT_SIZES = [1000, 20000]
+DEFAULT_SEEDS = [1, 2, 3]
+
+
+def first_difference(expected: List[Dict[str, Any]], actual: List[Dict[str, Any]]) -> Optional[str]:
+    if len(expected) != len(actual):
+        return f"{len(expected)} entries != {len(actual)} entries"
+    for expected_entry, actual_entry in zip(expected, actual):
+        if expected_entry != actual_entry:
+            return f"{expected_entry}\n  != {actual_entry}"
+    return None
+
+
+def check_extract(contents: bytes, context: csv_processor.CategorizationContext, workers: int) -> List[str]:
+    """Descriptions of every disagreement between the engines on one extract"""
+    failures = []
+    rows = list(csv.DictReader(io.StringIO(contents.decode("utf-8-sig"))))
+
+    row_stats, column_stats = csv_processor.new_stats(), csv_processor.new_stats()
+    by_row = list(csv_processor.iter_categorized_rows(rows, context, "check.csv", row_stats))
+    by_column = csv_processor.categorize_columns(rows, context, "check.csv", column_stats)
+    difference = first_difference(by_row, by_column)
+    if difference:
+        failures.append(f"categorize_columns != categorize_transaction: {difference}")
+    if row_stats != column_stats:
+        failures.append(f"categorize_columns stats {column_stats} != {row_stats}")
+
+    with contextlib.redirect_stdout(io.StringIO()):  # process_csv logs its progress
+        expected = csv_processor.process_csv(contents, "check.csv", context=context)
+        runs = {"columnar": csv_processor.process_csv(contents, "check.csv", engine="columnar", context=context)}
+        if workers > 1:
+            for engine in csv_processor.CSV_ENGINES:
+                runs[f"{engine}, {workers} workers"] = csv_processor.process_csv(
+                    contents, "check.csv", engine=engine, workers=workers, context=context
+                )
+    for name, result in runs.items():
+        difference = first_difference(expected["entries"], result["entries"])
+        if difference:
+            failures.append(f"process_csv[{name}] != process_csv[rows]: {difference}")
+        if result["stats"] != expected["stats"]:
+            failures.append(f"process_csv[{name}] stats {result['stats']} != {expected['stats']}")
+    return failures
+
+
+def run(sizes: List[int], seeds: List[int], workers: int) -> bool:
+    # Same keyword tables and Notion context as the benchmarks
+    csv_processor.EXPENSE_KEYWORDS.clear(); csv_processor.EXPENSE_KEYWORDS.update(synthetic.EXPENSE_KEYWORDS)
+    csv_processor.INCOME_KEYWORDS.clear(); csv_processor.INCOME_KEYWORDS.update(synthetic.INCOME_KEYWORDS)
+    csv_processor.rebuild_keyword_matchers()
+    context = csv_processor.CategorizationContext.from_reference_data(synthetic.reference_data())
+
+    ok = True
+    for size in sizes:
+        for seed in seeds:
+            failures = check_extract(synthetic.generate_csv(size, seed), context, workers)
+            print(f"{size:>9} rows  seed {seed:<4} {'OK' if not failures else 'MISMATCH'}", flush=True)
+            for failure in failures:
+                print(f"  {failure}")
+            ok = ok and not failures
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Rows per synthetic extract")
+    parser.add_argument("--seeds", type=int, nargs="+", default=DEFAULT_SEEDS)
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"Also check process_csv in that many processes (extracts of {csv_processor.PARALLEL_MIN_ROWS} rows or more)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        # Empty duplicate index, so no row is skipped and the real local state is untouched
+        settings.configure(state_path=os.path.join(state_dir, "check.sqlite3"))
+        ok = run(args.sizes, args.seeds, args.workers)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
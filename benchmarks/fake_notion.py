@@ -0,0 +1,255 @@
+"""
+Local stand-in for the parts of the Notion API the backend uses, for offline load tests:
+POST /v1/databases/{id}/query (cursors, last_edited_time filter and sort), POST /v1/pages
+and GET /v1/databases/{id}. It injects latency, 429s with Retry-After and 5xx errors.
+
+    python benchmarks/fake_notion.py --port 8100 --latency-ms 150 --rate-limit 3 --error-rate 0.02
+
+Point the backend at it with NOTION_API_URL=http://127.0.0.1:8100/v1, any NOTION_API_TOKEN
+and the ids printed at start-up (FAKE_DATABASE_IDS), or let load_driver.py start both.
+GET /_stats returns the request counters, POST /_reset clears the created pages and counters.
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "backend"))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from utils.notionAPI import REFERENCE_DATABASES  # noqa: E402
+import synthetic  # noqa: E402
+
+# Database name (as in database_ids.csv) -> id served by the fake
+FAKE_DATABASE_IDS = {
+    "EXPENSES": "fake-expenses",
+    "INCOMES": "fake-incomes",
+    "TRANSFER": "fake-transfer",
+    **{database_name: f"fake-{name.replace('_', '-')}" for name, (database_name, _) in REFERENCE_DATABASES.items()},
+}
+
+NOTION_MAX_PAGE_SIZE = 100
+PROPERTY_TYPES = ("title", "rich_text", "number", "date", "relation", "select", "checkbox")
+
+
+@dataclass
+class FaultConfig:
+    latency_ms: float = 0        # Added to every response
+    jitter_ms: float = 0         # Plus a uniform random 0..jitter_ms
+    rate_limit: float = 0        # Requests per second before answering 429 (0 = unlimited), like Notion's ~3
+    burst: int = 10              # Requests allowed at once by the rate limit
+    throttle_rate: float = 0     # Share of requests answered 429 at random, on top of the rate limit
+    retry_after: float = 1       # Retry-After of the random 429s, in seconds
+    error_rate: float = 0        # Share of requests answered with a 5xx
+    seed: Optional[int] = None
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _error(status: int, code: str, message: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse({"object": "error", "status": status, "code": code, "message": message}, status, headers=headers)
+
+
+def _with_types(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape written properties like Notion returns them (type key, plain_text on text items)"""
+    shaped = {}
+    for name, prop in properties.items():
+        prop = dict(prop)
+        prop_type = next((key for key in PROPERTY_TYPES if key in prop), None)
+        if prop_type in ("title", "rich_text"):
+            prop[prop_type] = [
+                {**item, "type": "text", "plain_text": item.get("text", {}).get("content", "")} for item in prop[prop_type]
+            ]
+        prop["type"] = prop_type
+        shaped[name] = prop
+    return shaped
+
+
+def _page(database_id: str, properties: Dict[str, Any]) -> Dict[str, Any]:
+    now = _now()
+    return {
+        "object": "page",
+        "id": str(uuid.uuid4()),
+        "created_time": now,
+        "last_edited_time": now,
+        "archived": False,
+        "parent": {"type": "database_id", "database_id": database_id},
+        "properties": _with_types(properties),
+    }
+
+
+class FakeNotion:
+    """In-memory databases, seeded with the synthetic reference data"""
+
+    def __init__(self, config: FaultConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.databases: Dict[str, List[Dict[str, Any]]] = {}
+        self.stats: Dict[str, int] = {}
+        self._tokens = float(config.burst)
+        self._updated_at = time.monotonic()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.databases = {database_id: [] for database_id in FAKE_DATABASE_IDS.values()}
+            for name, items in synthetic.reference_data().items():
+                database_name, title_property = REFERENCE_DATABASES[name]
+                self.databases[FAKE_DATABASE_IDS[database_name]] = [
+                    {**_page(FAKE_DATABASE_IDS[database_name], {title_property: {"title": [{"text": {"content": item["name"]}}]}}),
+                     "id": item["id"]}
+                    for item in items
+                ]
+            self.stats = {"requests": 0, "queries": 0, "pages_created": 0, "throttled": 0, "server_errors": 0}
+
+    def _take_token(self) -> float:
+        """0 if the request is within the rate limit, otherwise the seconds until it would be"""
+        if not self.config.rate_limit:
+            return 0
+        with self.lock:
+            now = time.monotonic()
+            self._tokens = min(self.config.burst, self._tokens + (now - self._updated_at) * self.config.rate_limit)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.config.rate_limit
+
+    def count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+    async def inject_faults(self) -> Optional[JSONResponse]:
+        """Latency for every request, then maybe a 429 or 5xx instead of the real answer"""
+        config = self.config
+        self.count("requests")
+        delay = (config.latency_ms + self.random.uniform(0, config.jitter_ms)) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+
+        wait = self._take_token()
+        if wait or self.random.random() < config.throttle_rate:
+            self.count("throttled")
+            retry_after = math.ceil(wait) if wait else config.retry_after
+            return _error(429, "rate_limited", "You have been rate limited.", {"Retry-After": str(retry_after)})
+        if self.random.random() < config.error_rate:
+            self.count("server_errors")
+            status = self.random.choice([500, 502, 503])
+            return _error(status, "internal_server_error", "Injected server error.")
+        return None
+
+    def query(self, database_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        with self.lock:
+            rows = list(self.databases[database_id])
+        time_filter = (payload.get("filter") or {}).get("last_edited_time") or {}
+        if time_filter.get("on_or_after"):
+            since = time_filter["on_or_after"]
+            rows = [row for row in rows if row["last_edited_time"] >= since]
+        for sort in payload.get("sorts") or []:
+            if sort.get("timestamp") in ("last_edited_time", "created_time"):
+                rows.sort(key=lambda row: row[sort["timestamp"]], reverse=sort.get("direction") == "descending")
+
+        start = int(payload.get("start_cursor") or 0)
+        page_size = min(int(payload.get("page_size") or NOTION_MAX_PAGE_SIZE), NOTION_MAX_PAGE_SIZE)
+        has_more = start + page_size < len(rows)
+        return {
+            "object": "list",
+            "results": rows[start:start + page_size],
+            "has_more": has_more,
+            "next_cursor": str(start + page_size) if has_more else None,
+        }
+
+    def create_page(self, database_id: str, properties: Dict[str, Any]) -> Dict[str, Any]:
+        page = _page(database_id, properties)
+        with self.lock:
+            self.databases[database_id].append(page)
+            self.stats["pages_created"] += 1
+        return page
+
+
+def create_app(config: FaultConfig) -> FastAPI:
+    app = FastAPI(title="Fake Notion API")
+    notion = FakeNotion(config)
+    app.state.notion = notion
+
+    @app.middleware("http")
+    async def faults(request: Request, call_next):
+        if not request.url.path.startswith("/v1/"):
+            return await call_next(request)  # Control routes (/_stats, /_reset)
+        if not request.headers.get("authorization", "").startswith("Bearer "):
+            return _error(401, "unauthorized", "API token is invalid.")
+        injected = await notion.inject_faults()
+        return injected or await call_next(request)
+
+    @app.post("/v1/databases/{database_id}/query")
+    async def query_database(database_id: str, request: Request):
+        if database_id not in notion.databases:
+            return _error(404, "object_not_found", f"Could not find database with ID: {database_id}.")
+        notion.count("queries")
+        return notion.query(database_id, await request.json() or {})
+
+    @app.get("/v1/databases/{database_id}")
+    async def get_database(database_id: str):
+        if database_id not in notion.databases:
+            return _error(404, "object_not_found", f"Could not find database with ID: {database_id}.")
+        return {"object": "database", "id": database_id, "properties": {}}
+
+    @app.post("/v1/pages")
+    async def create_page(request: Request):
+        payload = await request.json()
+        database_id = (payload.get("parent") or {}).get("database_id")
+        if database_id not in notion.databases:
+            return _error(404, "object_not_found", f"Could not find database with ID: {database_id}.")
+        return notion.create_page(database_id, payload.get("properties") or {})
+
+    @app.get("/_stats")
+    async def stats():
+        return {**notion.stats, "pages": {database_id: len(rows) for database_id, rows in notion.databases.items()}}
+
+    @app.post("/_reset")
+    async def reset():
+        notion.reset()
+        return {"status": "success"}
+
+    return app
+
+
+def parse_config(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--rate-limit", type=float, default=0, help="Requests/s before answering 429, 0 for none")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--throttle-rate", type=float, default=0, help="Share of random 429s")
+    parser.add_argument("--retry-after", type=float, default=1)
+    parser.add_argument("--error-rate", type=float, default=0, help="Share of random 5xx")
+    parser.add_argument("--seed", type=int)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    args = parse_config()
+    config = FaultConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_limit=args.rate_limit, burst=args.burst,
+        throttle_rate=args.throttle_rate, retry_after=args.retry_after, error_rate=args.error_rate, seed=args.seed
+    )
+    print("Database ids:", " ".join(f"{name}_DATABASE_ID={database_id}" for name, database_id in FAKE_DATABASE_IDS.items()))
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,209 @@
+"""
+End-to-end load test of the backend against the fake Notion server (fake_notion.py).
+Replays synthetic uploads (POST /process-csv), then saves entries (POST /save-transaction)
+and polls their jobs until Notion has them, reporting throughput and latency percentiles.
+
+    # Start the fake Notion server and the backend, then run the load
+    python benchmarks/load_driver.py --spawn --latency-ms 150 --rate-limit 3 --error-rate 0.05 --saves 200
+
+    # Or drive an already running backend (configured with NOTION_API_URL etc.)
+    python benchmarks/load_driver.py --backend-url http://127.0.0.1:8000 --notion-url http://127.0.0.1:8100
+
+With --spawn the backend gets a temporary state file, so saves are never skipped as duplicates.
+"""
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(BENCHMARKS_DIR, "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+import synthetic  # noqa: E402
+from fake_notion import FAKE_DATABASE_IDS  # noqa: E402
+
+FAKE_NOTION_ARGS = ["latency_ms", "jitter_ms", "rate_limit", "burst", "throttle_rate", "retry_after", "error_rate", "seed"]
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99/max in milliseconds"""
+    if not values:
+        return {"count": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    ordered = sorted(values)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+    return {"count": len(values), "p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": round(ordered[-1] * 1000, 1)}
+
+
+def wait_until_up(url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            requests.get(url, timeout=2)
+            return
+        except requests.ConnectionError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not come up within {timeout}s")
+            time.sleep(0.2)
+
+
+@contextlib.contextmanager
+def spawned_servers(args: argparse.Namespace) -> Iterator[None]:
+    """Start fake_notion.py and the backend (uvicorn) as subprocesses, logs in a temporary directory"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        fake_args = []
+        for name in FAKE_NOTION_ARGS:
+            value = getattr(args, name)
+            if value is not None:
+                fake_args += [f"--{name.replace('_', '-')}", str(value)]
+        env = {
+            **os.environ,
+            "NOTION_API_URL": f"{args.notion_url}/v1",
+            "NOTION_API_TOKEN": "fake-token",
+            "FINANCE_OS_STATE_PATH": os.path.join(work_dir, "state.sqlite3"),
+            **{f"{name}_DATABASE_ID": database_id for name, database_id in FAKE_DATABASE_IDS.items()},
+        }
+        notion_port = args.notion_url.rsplit(":", 1)[1]
+        backend_port = args.backend_url.rsplit(":", 1)[1]
+        processes = []
+        with open(os.path.join(work_dir, "fake_notion.log"), "w") as notion_log, \
+             open(os.path.join(work_dir, "backend.log"), "w") as backend_log:
+            try:
+                processes.append(subprocess.Popen(
+                    [sys.executable, os.path.join(BENCHMARKS_DIR, "fake_notion.py"), "--port", notion_port, *fake_args],
+                    stdout=notion_log, stderr=subprocess.STDOUT
+                ))
+                processes.append(subprocess.Popen(
+                    [sys.executable, "-m", "uvicorn", "main:app", "--port", backend_port, "--log-level", "warning"],
+                    cwd=BACKEND_DIR, env=env, stdout=backend_log, stderr=subprocess.STDOUT
+                ))
+                wait_until_up(f"{args.notion_url}/_stats")
+                wait_until_up(f"{args.backend_url}/")
+                yield
+            finally:
+                for process in processes:
+                    process.terminate()
+                for process in processes:
+                    process.wait(timeout=10)
+                if args.keep_logs:
+                    for log in ("fake_notion.log", "backend.log"):
+                        with open(os.path.join(work_dir, log)) as log_file:
+                            print(f"\n===== {log} =====\n{log_file.read()}")
+
+
+def run_uploads(args: argparse.Namespace) -> Dict[str, Any]:
+    """POST /process-csv args.uploads times, args.upload_concurrency at once"""
+    def upload(seed: int):
+        contents = synthetic.generate_csv(args.rows, seed=seed)
+        start = time.perf_counter()
+        response = requests.post(
+            f"{args.backend_url}/process-csv", files={"file": (f"extract-{seed}.csv", contents, "text/csv")}, timeout=600
+        )
+        response.raise_for_status()
+        return time.perf_counter() - start, response.json()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.upload_concurrency) as pool:
+        results = list(pool.map(upload, range(args.uploads)))
+    elapsed = time.perf_counter() - start
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_sec": round(args.rows * args.uploads / elapsed),
+        "latency": percentiles([latency for latency, _ in results]),
+        "entries": [entry for _, body in results for entry in body["entries"]],
+    }
+
+
+def run_saves(args: argparse.Namespace, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """POST /save-transaction for every entry, then poll GET /jobs/{id} until each job is done, failed or interrupted"""
+    def enqueue(entry: Dict[str, Any]):
+        start = time.perf_counter()
+        response = requests.post(f"{args.backend_url}/save-transaction", json=entry, timeout=60)
+        response.raise_for_status()
+        return time.perf_counter() - start, response.json()["data"]["job_id"]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.save_concurrency) as pool:
+        enqueued = list(pool.map(enqueue, entries))
+
+    pending = {job_id for _, job_id in enqueued}
+    jobs = {}
+    deadline = time.monotonic() + args.timeout
+    with ThreadPoolExecutor(max_workers=args.save_concurrency) as pool:
+        while pending and time.monotonic() < deadline:
+            time.sleep(args.poll_interval)
+            for job in pool.map(lambda job_id: requests.get(f"{args.backend_url}/jobs/{job_id}", timeout=30).json()["data"], list(pending)):
+                if job["status"] in ("done", "failed", "interrupted"):
+                    jobs[job["id"]] = job
+                    pending.discard(job["id"])
+    elapsed = time.perf_counter() - start
+
+    # Time from enqueue to the Notion page being created, as recorded by the queue
+    completion = [
+        (datetime.fromisoformat(job["updated_at"]) - datetime.fromisoformat(job["created_at"])).total_seconds()
+        for job in jobs.values()
+    ]
+    results = [job["result"] or {} for job in jobs.values()]
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "saves_per_sec": round(len(jobs) / elapsed, 2) if elapsed else None,
+        "enqueue_latency": percentiles([latency for latency, _ in enqueued]),
+        "completion_latency": percentiles(completion),
+        "done": sum(job["status"] == "done" for job in jobs.values()),
+        "failed": sum(job["status"] == "failed" for job in jobs.values()),
+        "interrupted": sum(job["status"] == "interrupted" for job in jobs.values()),
+        "timed_out": len(pending),
+        "retries": sum((result.get("data") or {}).get("retries", 0) for result in results),
+        "errors": sorted({result.get("message", "") for result in results if result.get("status") != "success"}),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    uploads = run_uploads(args)
+    entries = uploads.pop("entries")[:args.saves]
+    saves = run_saves(args, entries)
+    notion = requests.get(f"{args.notion_url}/_stats", timeout=10).json()
+    notion.pop("pages", None)
+    return {"config": {k: v for k, v in vars(args).items() if k != "output"}, "uploads": uploads, "saves": saves, "fake_notion": notion}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--notion-url", default="http://127.0.0.1:8100", help="Fake Notion server, for its /_stats")
+    parser.add_argument("--spawn", action="store_true", help="Start the fake Notion server and the backend")
+    parser.add_argument("--keep-logs", action="store_true", help="Print the spawned servers' logs at the end")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per uploaded extract")
+    parser.add_argument("--uploads", type=int, default=4)
+    parser.add_argument("--upload-concurrency", type=int, default=2)
+    parser.add_argument("--saves", type=int, default=100, help="Entries saved to Notion")
+    parser.add_argument("--save-concurrency", type=int, default=8, help="Parallel clients posting saves")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds to wait for the save jobs")
+    parser.add_argument("--output", default="load_results.json")
+    fake = parser.add_argument_group("fake Notion faults (with --spawn, see fake_notion.py)")
+    for name in FAKE_NOTION_ARGS:
+        fake.add_argument(f"--{name.replace('_', '-')}", type=int if name in ("burst", "seed") else float)
+    args = parser.parse_args()
+
+    with spawned_servers(args) if args.spawn else contextlib.nullcontext():
+        report = run(args)
+
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(json.dumps({key: report[key] for key in ("uploads", "saves", "fake_notion")}, indent=2))
+    print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
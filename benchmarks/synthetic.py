@@ -0,0 +1,120 @@
+"""
+Synthetic bank extracts in the format the backend expects (DATE,CONCEPT,IMPORT,LOADED),
+with a realistic mix of movements, repeated merchants and several years of dates.
+
+    python benchmarks/synthetic.py 100000 > extract.csv
+"""
+import random
+import sys
+from datetime import date, timedelta
+from typing import List, Tuple
+
+MERCHANTS = [
+    "MERCADONA", "LIDL", "CAPRABO", "BONPREU", "CONDIS", "CARREFOUR EXPRESS", "DIA", "ALDI",
+    "REPSOL", "CEPSA", "GALP", "RENFE VIAJEROS", "TMB METRO", "CABIFY", "UBER TRIP", "VUELING",
+    "AMAZON EU", "ALIEXPRESS", "ZARA", "DECATHLON", "IKEA", "MEDIAMARKT", "FNAC", "PRIMARK",
+    "NETFLIX", "SPOTIFY", "DISNEY PLUS", "APPLE COM BILL", "GOOGLE STORAGE", "MOVISTAR",
+    "FARMACIA CENTRAL", "FARMACIA NOU", "GLOVO", "JUST EAT", "TELEPIZZA", "BURGER KING",
+    "MCDONALDS", "FOSTERS HOLLYWOOD", "BAR LA PLAZA", "CAFE DEL MAR", "RESTAURANT CAN JOAN",
+    "FORN DE PA", "CINESA", "STEAM GAMES", "GIMNAS MUNICIPAL", "PARKING SABA", "AIRBNB", "BOOKING COM",
+]
+PEOPLE = [
+    "JOAN GARCIA", "MARIA LOPEZ", "PERE MARTI", "ANNA PUIG", "JORDI SOLER", "LAURA VIDAL",
+    "MARC FERRER", "NURIA ROCA", "ALBERT SERRA", "CLARA FONT", "DAVID MOLINA", "SARA CASAS",
+]
+EMPLOYERS = ["ACME SOLUTIONS SL", "UNIVERSITAT DE BARCELONA"]
+OTHER_CONCEPTS = ["RECIBO COMUNIDAD PROPIETARIOS", "RECIBO ENDESA ENERGIA", "COMISION MANTENIMIENTO", "REINTEGRO CAJERO", "DEVOLUCION COMPRA"]
+
+# (kind, weight): share of every kind of movement in a typical personal account
+MOVEMENT_MIX = [
+    ("card", 0.55), ("bizum_to", 0.10), ("bizum_from", 0.08), ("salary", 0.03),
+    ("transfer", 0.08), ("income", 0.04), ("other", 0.12),
+]
+
+START_DATE = date(2022, 1, 1)
+END_DATE = date(2025, 12, 31)
+
+EXPENSE_TYPES = ["Groceries", "Restaurants", "Transport", "Shopping", "Subscriptions", "Health", "Leisure", "Housing"]
+INCOME_TYPES = ["Salary", "Refunds", "Other"]
+
+# Keyword tables shaped like the ones users keep in csv_processor.py
+EXPENSE_KEYWORDS = {
+    "mercadona": "Groceries", "lidl": "Groceries", "caprabo": "Groceries", "bonpreu": "Groceries",
+    "condis": "Groceries", "carrefour": "Groceries", "aldi": "Groceries", "forn": "Groceries",
+    "repsol": "Transport", "cepsa": "Transport", "galp": "Transport", "renfe": "Transport",
+    "tmb": "Transport", "cabify": "Transport", "uber": "Transport", "vueling": "Transport", "parking": "Transport",
+    "amazon": "Shopping", "aliexpress": "Shopping", "zara": "Shopping", "decathlon": "Shopping",
+    "ikea": "Shopping", "mediamarkt": "Shopping", "fnac": "Shopping", "primark": "Shopping",
+    "netflix": "Subscriptions", "spotify": "Subscriptions", "disney": "Subscriptions", "apple": "Subscriptions",
+    "google": "Subscriptions", "movistar": "Subscriptions", "farmacia": "Health", "gimnas": "Health",
+    "glovo": "Restaurants", "just eat": "Restaurants", "telepizza": "Restaurants", "burger": "Restaurants",
+    "mcdonalds": "Restaurants", "bar ": "Restaurants", "cafe": "Restaurants", "restaurant": "Restaurants",
+    "cinesa": "Leisure", "steam": "Leisure", "airbnb": "Leisure", "booking": "Leisure",
+}
+INCOME_KEYWORDS = {"nomina": "Salary", "devolucion": "Refunds", "traspas": "Other"}
+
+
+def _zipf_weights(n: int) -> List[float]:
+    # A few merchants take most of the movements, like in a real extract
+    return [1 / rank for rank in range(1, n + 1)]
+
+
+def generate_rows(n: int, seed: int = 42, loaded_share: float = 0.05) -> List[Tuple[str, str, str, str]]:
+    """n (DATE, CONCEPT, IMPORT, LOADED) rows, newest first like bank exports"""
+    rng = random.Random(seed)
+    kinds, kind_weights = zip(*MOVEMENT_MIX)
+    merchant_weights = _zipf_weights(len(MERCHANTS))
+    days = (END_DATE - START_DATE).days
+    cards = [f"{rng.randint(1000, 9999)}" for _ in range(3)]
+
+    rows = []
+    for offset in sorted((rng.randint(0, days) for _ in range(n)), reverse=True):
+        kind = rng.choices(kinds, kind_weights)[0]
+        if kind == "card":
+            merchant = rng.choices(MERCHANTS, merchant_weights)[0]
+            concept, amount = f"TARGETA *{rng.choice(cards)} {merchant}", -rng.uniform(1, 120)
+        elif kind == "bizum_to":
+            concept, amount = f"BIZUM A: {rng.choice(PEOPLE)}", -rng.uniform(2, 60)
+        elif kind == "bizum_from":
+            concept, amount = f"BIZUM DE: {rng.choice(PEOPLE)}", rng.uniform(2, 60)
+        elif kind == "salary":
+            concept, amount = f"NOMINA CTE DE: {rng.choice(EMPLOYERS)}", rng.uniform(1400, 2600)
+        elif kind == "transfer":
+            concept, amount = f"TRASPAS {rng.choice(PEOPLE)}", rng.choice([-1, 1]) * rng.uniform(20, 800)
+        elif kind == "income":
+            concept, amount = f"INGRES EFECTIU {rng.choice(PEOPLE)}", rng.uniform(20, 300)
+        else:
+            concept, amount = rng.choice(OTHER_CONCEPTS), -rng.uniform(5, 250)
+        loaded = "TRUE" if rng.random() < loaded_share else ""
+        rows.append(((START_DATE + timedelta(days=offset)).isoformat(), concept, f" {amount:.2f}", loaded))
+    return rows
+
+
+def generate_csv(n: int, seed: int = 42, loaded_share: float = 0.05) -> bytes:
+    """Same as generate_rows, as the bytes of an uploaded CSV file"""
+    lines = ["DATE,CONCEPT,IMPORT,LOADED"]
+    lines.extend(",".join(row) for row in generate_rows(n, seed, loaded_share))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def reference_data() -> dict:
+    """Notion reference lists matching the generated extracts (every month of the date range)"""
+    months = []
+    year, month = START_DATE.year, START_DATE.month
+    while (year, month) <= (END_DATE.year, END_DATE.month):
+        name = date(year, month, 1).strftime("%b") + f" {str(year)[2:]}"
+        months.append({"id": f"month-{year}-{month:02d}", "name": name})
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return {
+        "accounts": [{"id": "account-main", "name": "Main Account Name"}, {"id": "account-savings", "name": "Savings"}],
+        "expense_types": [{"id": f"expense-type-{i}", "name": name} for i, name in enumerate(EXPENSE_TYPES)],
+        "income_types": [{"id": f"income-type-{i}", "name": name} for i, name in enumerate(INCOME_TYPES)],
+        "months": months,
+        "subscriptions": [],
+        "debts": [],
+        "savings": [],
+    }
+
+
+if __name__ == "__main__":
+    sys.stdout.buffer.write(generate_csv(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -3,8 +3,7 @@ import './App.css';
 
 // Import API functions from api.ts
 import {
-fetchAccounts, fetchExpenseTypes, fetchIncomeTypes, fetchMonths,
-fetchSubscriptions, fetchDebts, fetchSavings, processCsvFile, saveTransaction,
+fetchBootstrap, processCsvFileStream, saveTransaction, waitForJob,
 } from './api';
 
 // Import types from types.tsx
@@ -105,7 +104,8 @@ const [isSubmittingEntry, setIsSubmittingEntry] = useState(false);
 const [error, setError] = useState<string | null>(null);
 const [successMessage, setSuccessMessage] = useState<string | null>(null);
 const [uploadStats, setUploadStats] = useState<CSVProcessStatsData | null>(null);
-const [submittedCount, setSubmittedCount] = useState(0);
+const [submittedCount, setSubmittedCount] = useState(0); // Entries saved to Notion (job done)
+const [pendingSaves, setPendingSaves] = useState(0);     // Entries queued, job not finished yet
 
 // State for ordered focusable element IDs for shortcuts
 const [orderedFocusableElementIDs, setOrderedFocusableElementIDs] = useState<string[]>([]);
@@ -115,20 +115,15 @@ async function loadAllEntities() {
 setIsLoadingInitialData(true);
 setError(null);
 try {
-const [
-accountsData, expenseTypesData, incomeTypesData, monthsData,
-subscriptionsData, debtsData, savingsData
-] = await Promise.all([
-fetchAccounts(), fetchExpenseTypes(), fetchIncomeTypes(), fetchMonths(),
-fetchSubscriptions(), fetchDebts(), fetchSavings()
-]);
-setAccounts(accountsData);
-setExpenseTypes(expenseTypesData);
-setIncomeTypes(incomeTypesData);
-setMonths(monthsData);
-setSubscriptions(subscriptionsData);
-setDebts(debtsData);
-setSavings(savingsData);
+// One round trip for every list
+const bootstrap = await fetchBootstrap();
+setAccounts(bootstrap.accounts.items);
+setExpenseTypes(bootstrap.expense_types.items);
+setIncomeTypes(bootstrap.income_types.items);
+setMonths(bootstrap.months.items);
+setSubscriptions(bootstrap.subscriptions.items);
+setDebts(bootstrap.debts.items);
+setSavings(bootstrap.savings.items);
 } catch (err) {
 console.error("Failed to load entity data:", err);
 setError("Failed to load required data. Please reload the page.");
@@ -142,8 +137,13 @@ loadAllEntities();
 useEffect(() => {
 if (processedEntries.length > 0 && currentIndex < processedEntries.length) {
 const entry = processedEntries[currentIndex];
-const initialMonthId = entry.month_id || getMonthIdForDate(entry.date, months);
-setCurrentEntryData({ ...entry, month_id: initialMonthId, date: entry.date });
+// Entries keep streaming in while one is reviewed, don't discard the edits of the current one
+setCurrentEntryData(prev => {
+if (prev && prev.original_csv_filename === entry.original_csv_filename && prev.csv_row_index === entry.csv_row_index) {
+return { ...prev, month_id: prev.month_id || getMonthIdForDate(prev.date, months) };
+}
+return { ...entry, month_id: entry.month_id || getMonthIdForDate(entry.date, months), date: entry.date };
+});
 } else {
 setCurrentEntryData(null);
 }
@@ -288,16 +288,18 @@ if (rawCsvData.length === 0 && csvHeaders.length === 0) {
 setError("CSV data not parsed correctly. Please re-select the file."); return;
 }
 setIsProcessingCsv(true); setError(null); setSuccessMessage(null);
-try {
-const response = await processCsvFile(selectedCsvFile);
-setProcessedEntries(response.entries);
-setUploadStats(response.stats);
+setProcessedEntries([]);
+setUploadStats(null);
 setCurrentIndex(0);
 setSubmittedCount(0);
-if (response.entries.length === 0) {
+try {
+// Entries arrive as the backend categorizes them (file order), review can start with the first one
+const response = await processCsvFileStream(selectedCsvFile, entries => setProcessedEntries(prev => [...prev, ...entries]));
+setUploadStats(response.stats);
+if (response.stats.processed_for_review === 0) {
 setSuccessMessage(`CSV processed. ${response.message}. No new entries to load.`);
 } else {
-setSuccessMessage(`CSV processed. ${response.entries.length} entries ready for review.`);
+setSuccessMessage(`CSV processed. ${response.stats.processed_for_review} entries ready for review.`);
 }
 } catch (err: any) {
 setError(err.response?.data?.detail || err.response?.data?.message || err.message || "Error processing CSV on backend.");
@@ -347,26 +349,44 @@ default: return;
 setCurrentEntryData(newEntryData);
 };
 
-const handleSubmitEntry = async (event?: FormEvent) => {
-if (event) event.preventDefault();
-if (!currentEntryData) return;
-setIsSubmittingEntry(true); setError(null); setSuccessMessage(null);
+// Follows a queued save until the backend worker finishes it. The row is only marked
+// LOADED once the job is done, a failed save is reported and its row left unloaded.
+const trackSave = async (entry: TransactionEntryData, jobId: string) => {
+setPendingSaves(prev => prev + 1);
 try {
-await saveTransaction(currentEntryData);
-setSuccessMessage(`Entry "${currentEntryData.name}" saved!`);
+const job = await waitForJob(jobId);
+if (job.status === 'done') {
 setSubmittedCount(prev => prev + 1);
 setRawCsvData(prevRawData => {
 const newData = [...prevRawData];
-if (currentEntryData.csv_row_index !== undefined && newData[currentEntryData.csv_row_index]) {
-newData[currentEntryData.csv_row_index] = { ...newData[currentEntryData.csv_row_index], LOADED: 'true' };
+if (entry.csv_row_index !== undefined && newData[entry.csv_row_index]) {
+newData[entry.csv_row_index] = { ...newData[entry.csv_row_index], LOADED: 'true' };
 }
 return newData;
 });
-if (currentIndex < processedEntries.length - 1) {
-setCurrentIndex(prev => prev + 1);
+} else {
+setError(`Failed to save entry "${entry.name}": ${job.result?.message || 'unknown error'}`);
+}
+} catch (err: any) {
+setError(`Could not check the save of entry "${entry.name}": ${err.response?.data?.detail || err.message}`);
+} finally {
+setPendingSaves(prev => prev - 1);
+}
+};
+
+const handleSubmitEntry = async (event?: FormEvent) => {
+if (event) event.preventDefault();
+if (!currentEntryData) return;
+setIsSubmittingEntry(true); setError(null); setSuccessMessage(null);
+try {
+const response = await saveTransaction(currentEntryData);
+trackSave(currentEntryData, response.data.job_id); // Not awaited, review goes on while Notion saves
+setSuccessMessage(`Entry "${currentEntryData.name}" queued for saving!`);
+if (currentIndex < processedEntries.length - 1 || isProcessingCsv) {
+setCurrentIndex(prev => prev + 1); // While streaming, the next entry may still be on its way
 } else {
 setCurrentEntryData(null); // Clear current entry, all done
-setSuccessMessage('All entries processed and saved! You can download the updated CSV.');
+setSuccessMessage('All entries submitted. The updated CSV can be downloaded once their saves finish.');
 }
 } catch (err: any) {
 setError(err.response?.data?.message || err.message || `Failed to save entry "${currentEntryData.name}".`);
@@ -503,16 +523,22 @@ return (
     {processedEntries.length > 0 && currentEntryData && (
       <section className="section card entry-form-section">
         <div className="form-header">
-          <h2>2. Review & Submit ({currentIndex + 1} / {processedEntries.length})</h2>
+          <h2>2. Review & Submit ({currentIndex + 1} / {processedEntries.length}{isProcessingCsv ? '+' : ''})</h2>
           <div className="progress-bar">
             <div 
                 className="progress-bar-fill" 
                 style={{ width: `${(submittedCount / processedEntries.length) * 100}%` }}
             ></div>
-            <span className="progress-bar-text">{submittedCount} / {processedEntries.length} Submitted</span>
+            <span className="progress-bar-text">{submittedCount} / {processedEntries.length} Saved{pendingSaves > 0 ? ` (${pendingSaves} saving...)` : ''}</span>
           </div>
         </div>
         
+        {currentEntryData.possible_duplicate && (
+          <div className="message warning-message">
+            A transaction with the same date, concept, amount and account is already in Notion. Check this isn't the same movement before submitting.
+          </div>
+        )}
+
         <form onSubmit={handleSubmitEntry} onKeyDown={handleKeyPress} className="entry-form">
           <div className="form-grid">
             <div className="form-group">
@@ -615,7 +641,7 @@ return (
                   Copy from Previous
               </button>
               <button type="submit" disabled={isSubmittingEntry} className="button-primary">
-                  {isSubmittingEntry ? 'Submitting...' : (currentIndex === processedEntries.length - 1 ? 'Submit Last & Finish' : 'Submit & Next')}
+                  {isSubmittingEntry ? 'Submitting...' : (currentIndex === processedEntries.length - 1 && !isProcessingCsv ? 'Submit Last & Finish' : 'Submit & Next')}
               </button>
           </div>
         </form>
@@ -631,7 +657,7 @@ return (
           </button>
       </section>
     )}
-    { rawCsvData.length > 0 && submittedCount < processedEntries.length && submittedCount > 0 && !currentEntryData && (
+    { rawCsvData.length > 0 && submittedCount < processedEntries.length && submittedCount > 0 && !currentEntryData && pendingSaves === 0 && !isProcessingCsv && (
          <section className="section card partial-download-section">
           <h2>Partially Processed</h2>
           <p>You can download the CSV with entries processed so far.</p>
@@ -2,7 +2,8 @@
 import axios from 'axios';
 import type{
   Account, ExpenseType, IncomeType, Month, Subscription, Debt, Saving,
-  TransactionEntryData, CSVProcessResponseData, CSVProcessStatsData
+  TransactionEntryData, CSVProcessResponseData, CSVProcessStatsData, BatchSaveResponseData, SaveJobData,
+  CSVBatchProcessResponseData, BootstrapData
 } from './types';
 const API_BASE_URL = 'http://localhost:8000';
 
@@ -23,6 +24,9 @@ export const fetchSubscriptions = async (): Promise<Subscription[]> => (await ap
 export const fetchDebts = async (): Promise<Debt[]> => (await apiClient.get('/debts')).data;
 export const fetchSavings = async (): Promise<Saving[]> => (await apiClient.get('/savings')).data;
 
+// All the reference lists above in one (gzip-compressed) request
+export const fetchBootstrap = async (): Promise<BootstrapData> => (await apiClient.get('/bootstrap')).data;
+
 
 export const processCsvFile = async (file: File): Promise<CSVProcessResponseData> => {
   const formData = new FormData();
@@ -33,6 +37,60 @@ export const processCsvFile = async (file: File): Promise<CSVProcessResponseData
   return response.data;
 };
 
+// Processes several extracts in one request, entries come back merged and sorted by date
+export const processCsvFiles = async (files: File[]): Promise<CSVBatchProcessResponseData> => {
+  const formData = new FormData();
+  files.forEach(file => formData.append('files', file));
+  const response = await apiClient.post('/process-csv-batch', formData, {
+    headers: { 'Content-Type': 'multipart/form-data' },
+  });
+  return response.data;
+};
+
+// Streaming variant: entries are passed to onEntries as soon as the backend categorizes them
+// (in file order, one call per received chunk), the resolved value is the final stats record.
+export const processCsvFileStream = async (
+  file: File,
+  onEntries: (entries: TransactionEntryData[]) => void
+): Promise<Omit<CSVProcessResponseData, 'entries'>> => {
+  const formData = new FormData();
+  formData.append('file', file);
+  const response = await fetch(`${API_BASE_URL}/process-csv`, {
+    method: 'POST',
+    headers: { Accept: 'application/x-ndjson' },
+    body: formData,
+  });
+  if (!response.ok || !response.body) {
+    throw new Error((await response.json()).detail || `Error processing CSV (${response.status})`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let trailer: Omit<CSVProcessResponseData, 'entries'> | null = null;
+  const handleLines = (lines: string[]) => {
+    const entries: TransactionEntryData[] = [];
+    lines.forEach(line => {
+      if (!line.trim()) return;
+      const record = JSON.parse(line);
+      if ('stats' in record) trailer = record;
+      else entries.push(record);
+    });
+    if (entries.length > 0) onEntries(entries);
+  };
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop() ?? '';
+    handleLines(lines);
+  }
+  handleLines([buffer + decoder.decode()]);
+  if (!trailer) throw new Error('CSV stream ended before its stats record');
+  return trailer;
+};
+
 // This function now sends the complete TransactionEntryData object from the frontend
 // The backend will extract necessary fields for its *CreatePayload models
 export const saveTransaction = async (transactionData: TransactionEntryData): Promise<any> => {
@@ -46,4 +104,20 @@ export const saveTransaction = async (transactionData: TransactionEntryData): Pr
   
   console.log("Sending payload to save-transaction:", payload);
   return (await apiClient.post('/save-transaction', payload)).data;
-};
\ No newline at end of file
+};
+
+// Queues several entries in one request, job ids come back in the same order
+export const saveTransactions = async (transactions: TransactionEntryData[]): Promise<BatchSaveResponseData> =>
+  (await apiClient.post('/save-transactions', transactions)).data;
+
+// Saves are queued on the backend, this returns the job status and, once finished, its result
+export const fetchJob = async (jobId: string): Promise<SaveJobData> => (await apiClient.get(`/jobs/${jobId}`)).data.data;
+
+// Polls a save job until the worker has finished it ('done', 'failed' or 'interrupted')
+export const waitForJob = async (jobId: string, intervalMs = 1000): Promise<SaveJobData> => {
+  for (;;) {
+    const job = await fetchJob(jobId);
+    if (job.status !== 'pending' && job.status !== 'running') return job; // done, failed or interrupted
+    await new Promise(resolve => setTimeout(resolve, intervalMs));
+  }
+};
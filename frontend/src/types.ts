@@ -8,6 +8,23 @@ export interface Subscription extends BaseItem {}
 export interface Debt extends BaseItem {}
 export interface Saving extends BaseItem {}
 
+// One reference list of GET /bootstrap, version changes when its items do
+export interface BootstrapSection<T extends BaseItem> {
+    version: string;
+    synced_at: string | null; // Last sync of the backend mirror, null if read live from Notion
+    items: T[];
+}
+
+export interface BootstrapData {
+    accounts: BootstrapSection<Account>;
+    expense_types: BootstrapSection<ExpenseType>;
+    income_types: BootstrapSection<IncomeType>;
+    months: BootstrapSection<Month>;
+    subscriptions: BootstrapSection<Subscription>;
+    debts: BootstrapSection<Debt>;
+    savings: BootstrapSection<Saving>;
+}
+
 export interface TransactionEntryData {
   type: 'expense' | 'income' | 'transfer';
   date: string;
@@ -33,12 +50,15 @@ export interface TransactionEntryData {
   to_account_id?: string | null;
   to_saving_id?: string | null;
   transfer_type?: string | null;
+
+  possible_duplicate?: boolean; // Same fingerprint as a transaction already in Notion, see the backend's review_entries
 }
 
 export interface CSVProcessStatsData {
     total_rows_in_csv: number;
     processed_for_review: number;
     already_loaded_in_csv: number;
+    already_imported?: number;
     expenses_found: number;
     incomes_found: number;
     transfers_found: number;
@@ -50,4 +70,44 @@ export interface CSVProcessResponseData {
   message: string;
   entries: TransactionEntryData[];
   stats: CSVProcessStatsData;
-}
\ No newline at end of file
+  warnings?: string[];
+  timings?: Record<string, number> | null; // Milliseconds per phase (decode, fetch_reference, categorize, sort, validate; serialize is in the Server-Timing header only)
+  profile?: string | null; // cProfile summary, only with ?profile=1
+}
+
+export interface CSVFileResultData {
+  filename: string;
+  status: 'success' | 'error';
+  message: string;
+  stats?: CSVProcessStatsData | null;
+}
+
+export interface CSVBatchProcessResponseData {
+  status: 'success' | 'partial' | 'error';
+  message: string;
+  entries: TransactionEntryData[]; // All files merged, sorted by date
+  files: CSVFileResultData[];
+  warnings?: string[];
+}
+
+export interface SaveResultData {
+  status: string;
+  message: string;
+  data?: any;
+}
+
+export interface BatchSaveResponseData {
+  status: string; // 'queued'
+  message: string;
+  results: SaveResultData[]; // In request order, data.job_id / original_csv_filename / csv_row_index
+}
+
+export interface SaveJobData {
+  id: string;
+  status: 'pending' | 'running' | 'done' | 'failed' | 'interrupted';
+  payload: TransactionEntryData;
+  result?: SaveResultData | null;
+  attempts: number;
+  created_at: string;
+  updated_at: string;
+}